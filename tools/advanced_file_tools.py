@@ -6,31 +6,295 @@ Includes operations for analyzing files, searching file content, and manipulatin
 import sys
 
 import os
+import bisect
+import mmap
 import json
 import logging
+import math
 import platform
 import datetime
+import functools
+import itertools
 import mimetypes
 import re
+import stat
+import tempfile
 from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
 from langchain.callbacks.manager import CallbackManagerForToolRun
 from langchain.tools.base import BaseTool
 
+# PyInstaller creates a temp folder and stores path in _MEIPASS
+_BASE_PATH = getattr(sys, '_MEIPASS', None) or os.path.abspath(".")
+
+
+@functools.lru_cache(maxsize=None)
 def resource_path(relative_path):
     """
     Get absolute path to resource, works for dev and for PyInstaller
     """
+    return os.path.join(_BASE_PATH, relative_path)
+
+
+logger = logging.getLogger(__name__)
+
+# orjson, when installed, serializes the JSON that ModifyJsonFileTool writes
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# NumPy, when installed, builds the newline table for whole-file literal searches
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Non "text/*" MIME types that are still worth previewing as text
+_TEXT_APPLICATION_TYPES = frozenset({
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-sh",
+    "application/x-yaml",
+    "application/toml",
+})
+
+# Binary file extensions that are skipped when searching file content
+_SKIP_EXTENSIONS_RE = re.compile(
+    r'\.(?:png|jpe?g|gif|bmp|ico|webp|tiff?|psd'
+    r'|mp3|wav|flac|ogg|m4a|mp4|avi|mkv|mov|webm'
+    r'|zip|gz|bz2|xz|7z|rar|tar|jar|whl'
+    r'|exe|dll|so|dylib|bin|o|a|lib|class|pyc|pyo'
+    r'|pdf|iso|dmg|woff2?|ttf|otf|eot|sqlite|db)$',
+    re.IGNORECASE
+)
+
+# Characters that give a search pattern regex meaning; patterns without them (and without
+# line breaks) are plain substrings, which can be searched for in a whole file at once
+_REGEX_SYNTAX_CHARS = frozenset('.^$*+?{}[]\\|()\r\n')
+
+
+def _newline_offsets(buf):
+    """
+    Build a sorted table of newline offsets in a bytes-like buffer.
+    Returns an ndarray from NumPy's vectorized scan when available, otherwise a list.
+    """
+    if np is not None:
+        return np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == 0x0A)
+    offsets = []
+    pos = buf.find(b'\n')
+    while pos != -1:
+        offsets.append(pos)
+        pos = buf.find(b'\n', pos + 1)
+    return offsets
+
+
+# Index of the first newline at or after an offset, in a table from _newline_offsets
+_offset_index = np.searchsorted if np is not None else bisect.bisect_left
+
+
+def _find_matching_lines(regex, buf) -> List[tuple]:
+    """
+    Run a bytes literal-substring regex over a whole buffer and map each match to its line.
+    Returns a list of (line_number, line_text) tuples, one per matching line.
+    """
+    offsets = None
+    matching_lines = []
+    last_line = 0
+    for match in regex.finditer(buf):
+        # Only build the newline table once we know there is a match
+        if offsets is None:
+            offsets = _newline_offsets(buf)
+        index = int(_offset_index(offsets, match.start()))
+        line_num = index + 1
+        if line_num == last_line:
+            continue
+        last_line = line_num
+        start = int(offsets[index - 1]) + 1 if index else 0
+        if index == len(offsets) and start == len(buf):
+            # Empty match after the final newline, not a real line
+            break
+        end = int(offsets[index]) if index < len(offsets) else len(buf)
+        matching_lines.append((line_num, buf[start:end].decode('utf-8', errors='ignore').strip()))
+    return matching_lines
+
+
+def _search_lines(regex, lines) -> List[tuple]:
+    """
+    Apply a str regex to each line of an iterable of byte lines, as text-mode reading would
+    present them: decoded as UTF-8 with a CRLF ending turned into '\\n'.
+    Returns a list of (line_number, line_text) tuples, one per matching line.
+    """
+    matching_lines = []
+    for line_num, raw in enumerate(lines, 1):
+        line = raw.decode('utf-8', errors='ignore')
+        if line.endswith('\r\n'):
+            line = line[:-2] + '\n'
+        if regex.search(line):
+            matching_lines.append((line_num, line.strip()))
+    return matching_lines
+
+
+def _find_matching_lines_chunked(regex, file, chunk_size: int = 1 << 20) -> List[tuple]:
+    """
+    Fallback for literal searches in files that cannot be memory-mapped.
+    Scans 1 MiB chunks cut at line boundaries, carrying any partial last line into the next chunk.
+    """
+    matching_lines = []
+    carry = b''
+    line_base = 0
+    while True:
+        chunk = file.read(chunk_size)
+        if chunk:
+            chunk = carry + chunk
+            last_nl = chunk.rfind(b'\n')
+            if last_nl == -1:
+                carry = chunk
+                continue
+            scan, carry = chunk[:last_nl + 1], chunk[last_nl + 1:]
+        else:
+            scan, carry = carry, b''
+            if not scan:
+                break
+        for line_num, line in _find_matching_lines(regex, scan):
+            matching_lines.append((line_base + line_num, line))
+        line_base += scan.count(b'\n')
+    return matching_lines
+
+
+def _has_non_finite(data) -> bool:
+    """
+    Whether data contains a NaN or infinite float anywhere in its nested lists and dicts.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def _dump_json_bytes(data) -> bytes:
+    """
+    Serialize data as indented JSON bytes, using orjson when it is installed.
+    """
+    # orjson writes NaN and Infinity as null; json keeps them, and json.load reads them back
+    if orjson is not None and not _has_non_finite(data):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # Data orjson cannot encode (e.g. integers beyond 64 bits)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _write_json_file(path: str, data, mode_from: Optional[str] = None) -> None:
+    """
+    Write data as JSON to path with a single buffer write and an atomic rename.
+    The file keeps the permissions of mode_from (default: path itself), or gets 0o644 if
+    that does not exist.
+    """
+    buf = memoryview(_dump_json_bytes(data))
     try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
+        mode = stat.S_IMODE(os.stat(mode_from or path).st_mode)
+    except FileNotFoundError:
+        mode = 0o644
     
-    return os.path.join(base_path, relative_path)
+    # A unique temp file in the same directory, so concurrent writers don't share one
+    # and the rename stays on one filesystem
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or None, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        try:
+            while buf:
+                written = os.write(fd, buf)
+                buf = buf[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
-logger = logging.getLogger(__name__)
+def _compile_search_pattern(pattern: str):
+    """
+    Compile a search pattern.
+    A plain substring (or a pattern that is not a valid regex) becomes a bytes regex that
+    _search_in_file runs over the whole file. Anything else stays a str regex applied line
+    by line, so '$', '\\s', '\\w' and (?i) keep their per-line, Unicode meaning.
+    Uses RE2 when installed, whose linear-time matching cannot hang on
+    pathological patterns such as '(a+)+$'. Patterns RE2 does not support (lookarounds,
+    backreferences) fall back to the re module and so lose that protection.
+    """
+    if not _REGEX_SYNTAX_CHARS.intersection(pattern):
+        return re.compile(re.escape(pattern.encode('utf-8')))
+    
+    try:
+        import re2
+    except ImportError:
+        re2 = None
+    
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    
+    try:
+        return re.compile(pattern)
+    except re.error:
+        pass
+    
+    # Only a pattern that is not a valid regex at all is treated as a literal string
+    if '\r' in pattern or '\n' in pattern:
+        # A line never contains these, except for its final newline
+        return re.compile(re.escape(pattern))
+    return re.compile(re.escape(pattern.encode('utf-8')))
+
+
+def _search_in_file(regex, file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Search a single file and return {"file", "matches"} or None when nothing matches.
+    """
+    whole_file = isinstance(regex.pattern, bytes)
+    try:
+        with open(file_path, 'rb') as file:
+            try:
+                # mmap cannot map empty files; special files may also report a zero size
+                if os.fstat(file.fileno()).st_size == 0:
+                    raise ValueError("cannot mmap an empty file")
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    if whole_file:
+                        matching_lines = _find_matching_lines(regex, buf)
+                    else:
+                        matching_lines = _search_lines(regex, iter(buf.readline, b''))
+            except (OSError, ValueError, TypeError):
+                # TypeError: some regex engines cannot scan an mmap object directly
+                file.seek(0)
+                if whole_file:
+                    matching_lines = _find_matching_lines_chunked(regex, file)
+                else:
+                    matching_lines = _search_lines(regex, file)
+            
+            if matching_lines:
+                return {
+                    "file": file_path,
+                    "matches": matching_lines
+                }
+    except Exception as e:
+        logger.warning(f"Error reading file {file_path}: {str(e)}")
+    return None
+
 
 class SearchFileContentTool(BaseTool):
     """Tool for searching for a pattern within files in a directory."""
@@ -53,12 +317,10 @@ class SearchFileContentTool(BaseTool):
         """Search for a pattern in files within a directory."""
         try:
             # Parse the input
-            import json
             try:
                 search_info = json.loads(search_info_str)
             except json.JSONDecodeError:
                 # Try to extract info from plain text
-                import re
                 dir_match = re.search(r"directory['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", search_info_str)
                 pattern_match = re.search(r"pattern['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", search_info_str)
                 recursive_match = re.search(r"recursive['\"]?\s*[:=]\s*(true|false)", search_info_str)
@@ -93,78 +355,65 @@ class SearchFileContentTool(BaseTool):
             if not os.path.isdir(expanded_dir):
                 return f"Error: '{directory}' is not a directory"
             
-            # Compile the regex pattern
-            try:
-                regex = re.compile(pattern)
-            except re.error:
-                # If pattern is not a valid regex, treat it as a literal string
-                regex = re.compile(re.escape(pattern))
+            # Compile the pattern (bytes for plain substrings, so they can scan a whole mmap'd file)
+            regex = _compile_search_pattern(pattern)
             
-            # Search for the pattern in files
-            results = []
+            # Search for the pattern in files, then format once at the end
+            results = self._search_files(expanded_dir, regex, recursive)
             
-            def search_in_file(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                        matching_lines = []
-                        for i, line in enumerate(file, 1):
-                            if regex.search(line):
-                                matching_lines.append((i, line.strip()))
-                        
-                        if matching_lines:
-                            return {
-                                "file": file_path,
-                                "matches": matching_lines
-                            }
-                except Exception as e:
-                    logger.warning(f"Error reading file {file_path}: {str(e)}")
-                return None
-            
-            # Walk through the directory
-            if recursive:
-                for root, _, files in os.walk(expanded_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        result = search_in_file(file_path)
-                        if result:
-                            results.append(result)
-            else:
-                for file in os.listdir(expanded_dir):
-                    file_path = os.path.join(expanded_dir, file)
-                    if os.path.isfile(file_path):
-                        result = search_in_file(file_path)
-                        if result:
-                            results.append(result)
-            
-            # Format the results
             if not results:
                 return f"No matches found for pattern '{pattern}' in directory '{directory}'"
             
-            output = [f"Found {len(results)} files with pattern '{pattern}' in directory '{directory}':"]
-            
-            for result in results:
-                file_path = result["file"]
-                matches = result["matches"]
-                
-                rel_path = os.path.relpath(file_path, expanded_dir)
-                output.append(f"\nFile: {rel_path}")
-                
-                # Limit number of matches displayed per file
-                max_matches = 5
-                shown_matches = matches[:max_matches]
-                
-                for line_num, line in shown_matches:
-                    output.append(f"  Line {line_num}: {line}")
-                
-                if len(matches) > max_matches:
-                    output.append(f"  ... and {len(matches) - max_matches} more matches")
-            
-            return "\n".join(output)
+            return self._format_results(results, pattern, directory, expanded_dir)
             
         except Exception as e:
             logger.error(f"Error searching file content: {str(e)}")
             return f"Error searching file content: {str(e)}"
 
+    def _search_files(self, expanded_dir: str, regex, recursive: bool) -> List[Dict[str, Any]]:
+        """Walk the directory and return a list of {"file", "matches"} dicts, one per matching file."""
+        results = []
+        if recursive:
+            for root, _, files in os.walk(expanded_dir):
+                for file in files:
+                    if _SKIP_EXTENSIONS_RE.search(file):
+                        continue
+                    result = _search_in_file(regex, os.path.join(root, file))
+                    if result:
+                        results.append(result)
+        else:
+            for file in os.listdir(expanded_dir):
+                if _SKIP_EXTENSIONS_RE.search(file):
+                    continue
+                file_path = os.path.join(expanded_dir, file)
+                if os.path.isfile(file_path):
+                    result = _search_in_file(regex, file_path)
+                    if result:
+                        results.append(result)
+        return results
+    
+    def _format_results(self, results: List[Dict[str, Any]], pattern: str, directory: str, expanded_dir: str) -> str:
+        """Render search results as the text returned to the agent."""
+        # Limit number of matches displayed per file
+        max_matches = 5
+        parts = [f"Found {len(results)} files with pattern '{pattern}' in directory '{directory}':"]
+        
+        for result in results:
+            matches = result["matches"]
+            parts.append("\n\nFile: ")
+            parts.append(os.path.relpath(result["file"], expanded_dir))
+            
+            for line_num, line in matches[:max_matches]:
+                parts.append("\n  Line ")
+                parts.append(str(line_num))
+                parts.append(": ")
+                parts.append(line)
+            
+            if len(matches) > max_matches:
+                parts.append(f"\n  ... and {len(matches) - max_matches} more matches")
+        
+        return "".join(parts)
+
 
 class AnalyzeFileTool(BaseTool):
     """Tool for analyzing a file and returning metadata."""
@@ -237,19 +486,33 @@ class AnalyzeFileTool(BaseTool):
             ]
             
             # Add more specific info based on file type
-            if file_type and "text" in file_type:
+            if file_type == "Unknown" or "text" in file_type or file_type in _TEXT_APPLICATION_TYPES:
                 # For text files, show a preview
                 try:
-                    with open(expanded_path, 'r', encoding='utf-8', errors='ignore') as file:
-                        lines = file.readlines()
-                        preview_lines = [line.strip() for line in lines[:5]]
+                    with open(expanded_path, 'rb', buffering=1 << 16) as file:
+                        # A NUL byte in the first 512 bytes means binary, whatever the extension says
+                        head = file.read(512)
+                        if b'\x00' not in head:
+                            file.seek(0)
+                            # Only read the lines we show instead of the whole file
+                            raw_lines = list(itertools.islice(file, 5))
+                            preview_lines = [line.decode('utf-8', errors='ignore').strip() for line in raw_lines]
                         
-                        output.append("\nPreview (first 5 lines):")
-                        for i, line in enumerate(preview_lines, 1):
-                            output.append(f"  {i}: {line}")
+                            output.append("\nPreview (first 5 lines):")
+                            for i, line in enumerate(preview_lines, 1):
+                                output.append(f"  {i}: {line}")
                         
-                        if len(lines) > 5:
-                            output.append(f"  ... and {len(lines) - 5} more lines")
+                            # Count the remaining lines with C-level bytes.count over large chunks
+                            total_lines = len(raw_lines)
+                            tail = b''
+                            for chunk in iter(lambda: file.read(1 << 20), b''):
+                                total_lines += chunk.count(b'\n')
+                                tail = chunk
+                            if tail and not tail.endswith(b'\n'):
+                                total_lines += 1
+                        
+                            if total_lines > 5:
+                                output.append(f"  ... and {total_lines - 5} more lines")
                 except Exception as e:
                     output.append(f"\nCould not read file content: {str(e)}")
             
@@ -320,27 +583,26 @@ class ModifyJsonFileTool(BaseTool):
             # Create a backup
             backup_path = f"{expanded_path}.bak"
             try:
-                with open(backup_path, 'w', encoding='utf-8') as file:
-                    json.dump(data, file, indent=2)
+                _write_json_file(backup_path, data, mode_from=expanded_path)
             except Exception as e:
                 return f"Error creating backup file: {str(e)}"
             
-            # Update the data
-            def update_nested(d, updates):
-                for k, v in updates.items():
-                    if isinstance(v, dict) and k in d and isinstance(d[k], dict):
-                        # Recursive update for nested dictionaries
-                        update_nested(d[k], v)
+            # Update the data, walking nested dictionaries with an explicit stack
+            stack = [(data, updates)]
+            while stack:
+                d, u = stack.pop()
+                for k, v in u.items():
+                    current = d.get(k)
+                    if isinstance(v, dict) and isinstance(current, dict):
+                        # Merge nested dictionaries on a later iteration
+                        stack.append((current, v))
                     else:
                         # Direct update for other cases
                         d[k] = v
             
-            update_nested(data, updates)
-            
             # Write the updated data back to the file
             try:
-                with open(expanded_path, 'w', encoding='utf-8') as file:
-                    json.dump(data, file, indent=2)
+                _write_json_file(expanded_path, data)
             except Exception as e:
                 return f"Error writing updated data to file: {str(e)}"
             
@@ -5,11 +5,20 @@ Includes operations for opening, closing, and managing applications.
 
 import sys
 
+import io
 import os
+import json
+import hashlib
+import re
+import tempfile
 import platform
 import subprocess
 import logging
+import time
+import threading
 import psutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Union
 from langchain.callbacks.manager import CallbackManagerForToolRun
 from langchain.tools.base import BaseTool
@@ -29,6 +38,226 @@ def resource_path(relative_path):
 
 logger = logging.getLogger(__name__)
 
+# Prefer orjson for parsing tool input when it is installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSONError = orjson.JSONDecodeError
+except ImportError:
+    _json_loads = json.loads
+    _JSONError = json.JSONDecodeError
+
+# Invariant for the lifetime of the process, so resolve once at import
+_CURRENT_OS = platform.system()
+_IS_REPLIT = os.environ.get('REPL_ID') is not None or os.environ.get('REPL_OWNER') is not None
+
+# Dictionary mapping common app names to process names
+_APP_PROCESS_MAP = {
+    "chrome": ["chrome", "googlechrome"],
+    "firefox": ["firefox", "mozilla firefox"],
+    "edge": ["msedge", "microsoft edge"],
+    "safari": ["safari"],
+    "notepad": ["notepad"],
+    "word": ["winword", "microsoft word"],
+    "excel": ["excel", "microsoft excel"],
+    "powerpoint": ["powerpnt", "microsoft powerpoint"],
+    "vscode": ["code", "visual studio code"],
+    "terminal": ["terminal", "cmd", "command prompt", "powershell"],
+    "explorer": ["explorer"],
+    "calculator": ["calc"],
+    "paint": ["mspaint"],
+    "itunes": ["itunes"],
+    "spotify": ["spotify"],
+    "vlc": ["vlc"],
+    "photoshop": ["photoshop"],
+    "illustrator": ["illustrator"],
+    "acrobat": ["acrobat", "adobe acrobat"],
+    "teams": ["teams", "microsoft teams"],
+    "zoom": ["zoom"],
+    "skype": ["skype"]
+}
+
+# Inverted index: app name or any of its process names -> process names to match
+_ALIAS_TO_PROCLIST: Dict[str, List[str]] = {}
+for _key, _values in _APP_PROCESS_MAP.items():
+    for _alias in {_key, *_values}:
+        _ALIAS_TO_PROCLIST.setdefault(_alias, []).extend(_values)
+
+# Dictionary of common process names to display names
+_PROC_DISPLAY_MAP = {
+    "chrome": "Google Chrome",
+    "firefox": "Mozilla Firefox",
+    "msedge": "Microsoft Edge",
+    "safari": "Safari",
+    "notepad": "Notepad",
+    "winword": "Microsoft Word",
+    "excel": "Microsoft Excel",
+    "powerpnt": "Microsoft PowerPoint",
+    "code": "Visual Studio Code",
+    "cmd": "Command Prompt",
+    "powershell": "PowerShell",
+    "explorer": "File Explorer",
+    "calc": "Calculator",
+    "mspaint": "Paint",
+    "itunes": "iTunes",
+    "spotify": "Spotify",
+    "vlc": "VLC Media Player",
+    "photoshop": "Adobe Photoshop",
+    "illustrator": "Adobe Illustrator",
+    "acrobat": "Adobe Acrobat",
+    "teams": "Microsoft Teams",
+    "zoom": "Zoom",
+    "skype": "Skype"
+}
+
+# System and background processes hidden from the running-apps list
+_SYSTEM_PROCS = frozenset({"system", "system idle process", "registry", "smss.exe", "csrss.exe", "wininit.exe"})
+
+# Short-lived cache of the last list_running_apps output; 'gen' is bumped on every
+# invalidation so a listing that was being built at the time is not stored
+_LIST_CACHE = {'ts': 0.0, 'value': None, 'gen': 0}
+_LIST_TTL = 2.0
+_LIST_LOCK = threading.Lock()
+
+# How long to wait for macOS `open`, which exits once LaunchServices has handed the app off
+# or failed to find it; past this the launch is assumed to be under way
+_OPEN_TIMEOUT = 5
+
+# Temp-file extension for content handed to an app, first matching substring wins
+_EXT_MAP = (
+    ("word", ".docx"),
+    ("excel", ".xlsx"),
+    ("powerpoint", ".pptx"),
+    # Default to Python for code editors
+    ("code", ".py"),
+    ("vscode", ".py"),
+    ("sublime", ".py"),
+    ("atom", ".py"),
+)
+
+# Patterns for pulling fields out of non-JSON input
+_APP_NAME_RE = re.compile(r"app_name['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]")
+_CONTENT_RE = re.compile(r"content_to_write['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]")
+
+@dataclass(slots=True)
+class _ProcRec:
+    """Instance count and first PID seen for one display name in the running-apps listing."""
+    count: int
+    pid: int
+
+
+def _invalidate_running_apps_cache() -> None:
+    """Force the next list_running_apps call to enumerate processes again."""
+    with _LIST_LOCK:
+        _LIST_CACHE['gen'] += 1
+        _LIST_CACHE['ts'] = 0.0
+
+
+def _write_temp_file(content: str, suffix: str) -> str:
+    """
+    Write content to a temporary file with the given suffix and return its path.
+    Files are named after a hash of their content, so opening the same content
+    again reuses the existing file instead of creating a new one.
+    """
+    data = content.encode('utf-8')
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    temp_file = os.path.join(tempfile.gettempdir(), f"autopilot-{digest}{suffix}")
+    
+    try:
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+    except FileExistsError:
+        # Reuse it only if it still holds exactly this content (the app may have edited it)
+        try:
+            if os.path.getsize(temp_file) == len(data):
+                with open(temp_file, 'rb') as file:
+                    if file.read() == data:
+                        return temp_file
+        except OSError:
+            pass
+        fd, temp_file = tempfile.mkstemp(suffix=suffix)
+    
+    view = memoryview(data)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return temp_file
+
+
+def _process_name(pid: int) -> Optional[tuple]:
+    """Return (pid, name) for a PID, or None if the process is gone or inaccessible."""
+    try:
+        return pid, psutil.Process(pid).name()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def _safe_terminate(proc) -> bool:
+    """Send a terminate signal to a process, returning False if it is gone or protected."""
+    try:
+        proc.terminate()
+        return True
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        # Process might have already disappeared or access denied
+        return False
+
+
+def _build_running_apps_listing() -> str:
+    """Enumerate running processes, format the listing and store it in the cache."""
+    generation = _LIST_CACHE['gen']
+    
+    # Get running processes, reading each process's name in parallel
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        proc_infos = [info for info in executor.map(_process_name, psutil.pids()) if info]
+    
+    processes = {}
+    for pid, raw_name in proc_infos:
+        proc_name = raw_name.lower()
+        
+        # Skip system processes and background processes
+        if proc_name in _SYSTEM_PROCS:
+            continue
+        
+        # Use friendly name if available, trying the exact name without extension first
+        display_name = _PROC_DISPLAY_MAP.get(proc_name.rsplit('.', 1)[0])
+        if not display_name:
+            for key, value in _PROC_DISPLAY_MAP.items():
+                if key in proc_name:
+                    display_name = value
+                    break
+        
+        if not display_name:
+            display_name = raw_name
+        
+        record = processes.get(display_name)
+        if record:
+            record.count += 1
+        else:
+            processes[display_name] = _ProcRec(1, pid)
+    
+    # Format the output
+    if not processes:
+        return "No user applications currently running."
+    
+    output = io.StringIO()
+    output.write("Currently running applications:")
+    
+    # Sort processes by name; str.lower runs once per name as the sort key
+    for name in sorted(processes, key=str.lower):
+        info = processes[name]
+        count_str = f" ({info.count} instances)" if info.count > 1 else ""
+        output.write(f"\n- {name}{count_str} (PID: {info.pid})")
+    
+    result = output.getvalue()
+    with _LIST_LOCK:
+        # Skip the store if an app was opened or closed while we were enumerating
+        if _LIST_CACHE['gen'] == generation:
+            _LIST_CACHE['ts'] = time.monotonic()
+            _LIST_CACHE['value'] = result
+    return result
+
+
 class OpenAdvancedApplicationTool(BaseTool):
     """Tool for opening an application with advanced options."""
     
@@ -48,18 +277,13 @@ class OpenAdvancedApplicationTool(BaseTool):
     def _run(self, app_info_str: str, run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
         """Open an application with advanced options."""
         try:
-            # Check if running in Replit environment
-            is_replit = os.environ.get('REPL_ID') is not None or os.environ.get('REPL_OWNER') is not None
-            
             # Parse the input
-            import json
             try:
-                app_info = json.loads(app_info_str)
-            except json.JSONDecodeError:
+                app_info = _json_loads(app_info_str)
+            except _JSONError:
                 # Try to extract info from plain text
-                import re
-                app_match = re.search(r"app_name['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", app_info_str)
-                content_match = re.search(r"content_to_write['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", app_info_str)
+                app_match = _APP_NAME_RE.search(app_info_str)
+                content_match = _CONTENT_RE.search(app_info_str)
                 
                 if app_match:
                     app_info = {
@@ -83,96 +307,91 @@ class OpenAdvancedApplicationTool(BaseTool):
             content_to_write = app_info.get("content_to_write", None)
             
             # If running in Replit environment, return appropriate message
-            if is_replit:
+            if _IS_REPLIT:
                 return f"Cannot launch desktop application '{app_name}' in the Replit environment. This tool is designed to work on local machines. The application would need to be installed on your local computer to be launched."
             
-            # Get the operating system
-            current_os = platform.system()
-            
             # Create a temporary file for content_to_write if needed
             temp_file = None
             if content_to_write:
-                import tempfile
-                
                 # Create temp file with the right extension based on the app
-                extension = ".txt"  # Default
-                if "word" in app_name.lower():
-                    extension = ".docx"
-                elif "excel" in app_name.lower():
-                    extension = ".xlsx"
-                elif "powerpoint" in app_name.lower():
-                    extension = ".pptx"
-                elif any(code_ext in app_name.lower() for code_ext in ["code", "vscode", "sublime", "atom"]):
-                    extension = ".py"  # Default to Python for code editors
+                app_name_lower = app_name.lower()
+                extension = next((ext for key, ext in _EXT_MAP if key in app_name_lower), ".txt")
                 
-                fd, temp_file = tempfile.mkstemp(suffix=extension)
-                with os.fdopen(fd, 'w') as file:
-                    file.write(content_to_write)
+                temp_file = _write_temp_file(content_to_write, extension)
             
-            # Open the application based on OS
-            if current_os == "Darwin":  # macOS
-                if temp_file:
-                    # Open the temp file with the specified application
-                    command = ["open", "-a", app_name, temp_file]
-                else:
-                    # Just open the application
-                    command = ["open", "-a", app_name]
+            try:
+                # Open the application based on OS
+                if _CURRENT_OS == "Darwin":  # macOS
+                    if temp_file:
+                        # Open the temp file with the specified application
+                        command = ["open", "-a", app_name, temp_file]
+                    else:
+                        # Just open the application
+                        command = ["open", "-a", app_name]
+                        
+                    # `open` is short-lived, so wait for it (bounded) to catch lookup failures
+                    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+                    try:
+                        _, stderr = proc.communicate(timeout=_OPEN_TIMEOUT)
+                    except subprocess.TimeoutExpired:
+                        # Still going; stop listening rather than hold the agent any longer
+                        proc.stderr.close()
+                        stderr = ""
                     
-                result = subprocess.run(command, capture_output=True, text=True)
-                
-                if result.returncode != 0:
-                    return f"Error opening {app_name}: {result.stderr}"
-                
-                if temp_file:
-                    return f"Successfully opened {app_name} with the provided content in {temp_file}"
-                else:
-                    return f"Successfully opened {app_name}"
-                
-            elif current_os == "Windows":
-                # Handle common Windows applications
-                if app_name.lower() == "notepad" and content_to_write:
-                    if not temp_file:
-                        fd, temp_file = tempfile.mkstemp(suffix=".txt")
-                        with os.fdopen(fd, 'w') as file:
-                            file.write(content_to_write)
+                    if proc.returncode:
+                        return f"Error opening {app_name}: {stderr.strip()}"
                     
-                    command = ["notepad.exe", temp_file]
-                    subprocess.Popen(command, shell=True)
-                    return f"Successfully opened Notepad with the provided content in {temp_file}"
-                else:
-                    try:
-                        if temp_file:
-                            # Open the temp file with the default application
-                            result = subprocess.Popen(f'start "" "{temp_file}"', shell=True)
-                            return f"Successfully opened {app_name} with the provided content in {temp_file}"
-                        else:
-                            # Just open the application
-                            result = subprocess.Popen(app_name, shell=True)
-                            return f"Attempted to open {app_name}"
-                    except Exception as e:
-                        # Try via Start Menu
-                        try:
-                            subprocess.Popen(f'start {app_name}', shell=True)
-                            return f"Attempted to open {app_name} through Start Menu"
-                        except Exception as e2:
-                            return f"Failed to open {app_name}: {str(e2)}"
-            
-            else:  # Linux and others
-                if temp_file:
-                    # For graphical applications that can open files
-                    try:
-                        command = ["xdg-open", temp_file]
+                    if temp_file:
+                        return f"Successfully opened {app_name} with the provided content in {temp_file}"
+                    else:
+                        return f"Successfully opened {app_name}"
+                    
+                elif _CURRENT_OS == "Windows":
+                    # Handle common Windows applications
+                    if app_name.lower() == "notepad" and content_to_write:
+                        if not temp_file:
+                            temp_file = _write_temp_file(content_to_write, ".txt")
+                        
+                        command = ["notepad.exe", temp_file]
                         subprocess.Popen(command)
-                        return f"Opened file {temp_file} with default application for its type"
-                    except Exception as e:
-                        return f"Failed to open {temp_file}: {str(e)}"
-                else:
-                    # Try to run the application directly
-                    try:
-                        subprocess.Popen([app_name])
-                        return f"Attempted to open {app_name}"
-                    except Exception as e:
-                        return f"Failed to open {app_name}: {str(e)}"
+                        return f"Successfully opened Notepad with the provided content in {temp_file}"
+                    else:
+                        try:
+                            if temp_file:
+                                # Open the temp file with the default application
+                                os.startfile(temp_file)
+                                return f"Successfully opened {app_name} with the provided content in {temp_file}"
+                            else:
+                                # Just open the application, without a cmd.exe or console in between
+                                subprocess.Popen([app_name], creationflags=subprocess.DETACHED_PROCESS)
+                                return f"Attempted to open {app_name}"
+                        except Exception as e:
+                            # Try via Start Menu; ShellExecute resolves registered app names like `start` does
+                            try:
+                                os.startfile(app_name)
+                                return f"Attempted to open {app_name} through Start Menu"
+                            except OSError as e2:
+                                return f"Failed to open {app_name}: {str(e2)}"
+                
+                else:  # Linux and others
+                    if temp_file:
+                        # For graphical applications that can open files
+                        try:
+                            command = ["xdg-open", temp_file]
+                            subprocess.Popen(command)
+                            return f"Opened file {temp_file} with default application for its type"
+                        except Exception as e:
+                            return f"Failed to open {temp_file}: {str(e)}"
+                    else:
+                        # Try to run the application directly
+                        try:
+                            subprocess.Popen([app_name])
+                            return f"Attempted to open {app_name}"
+                        except Exception as e:
+                            return f"Failed to open {app_name}: {str(e)}"
+            finally:
+                # Launching an app changes the process list
+                _invalidate_running_apps_cache()
                         
         except Exception as e:
             logger.error(f"Error opening application: {str(e)}")
@@ -195,77 +414,53 @@ class CloseApplicationTool(BaseTool):
     def _run(self, app_name: str, run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
         """Close an application."""
         try:
-            # Check if running in Replit environment
-            is_replit = os.environ.get('REPL_ID') is not None or os.environ.get('REPL_OWNER') is not None
-            
             # Standardize input (parse JSON if needed)
             try:
-                import json
-                parsed = json.loads(app_name)
+                parsed = _json_loads(app_name)
                 if isinstance(parsed, dict) and "app_name" in parsed:
                     app_name = parsed["app_name"]
-            except (json.JSONDecodeError, TypeError):
+            except (_JSONError, TypeError):
                 # Not JSON, use as is
                 pass
             
             app_name = app_name.strip().lower()
             
             # If running in Replit environment, return appropriate message
-            if is_replit:
+            if _IS_REPLIT:
                 return f"Cannot close desktop application '{app_name}' in the Replit environment. This tool is designed to work on local machines."
             
-            # Dictionary mapping common app names to process names
-            app_process_map = {
-                "chrome": ["chrome", "googlechrome"],
-                "firefox": ["firefox", "mozilla firefox"],
-                "edge": ["msedge", "microsoft edge"],
-                "safari": ["safari"],
-                "notepad": ["notepad"],
-                "word": ["winword", "microsoft word"],
-                "excel": ["excel", "microsoft excel"],
-                "powerpoint": ["powerpnt", "microsoft powerpoint"],
-                "vscode": ["code", "visual studio code"],
-                "terminal": ["terminal", "cmd", "command prompt", "powershell"],
-                "explorer": ["explorer"],
-                "calculator": ["calc"],
-                "paint": ["mspaint"],
-                "itunes": ["itunes"],
-                "spotify": ["spotify"],
-                "vlc": ["vlc"],
-                "photoshop": ["photoshop"],
-                "illustrator": ["illustrator"],
-                "acrobat": ["acrobat", "adobe acrobat"],
-                "teams": ["teams", "microsoft teams"],
-                "zoom": ["zoom"],
-                "skype": ["skype"]
-            }
-            
             # Get possible process names for the given app
-            process_names = []
-            for key, values in app_process_map.items():
-                if app_name in values or app_name == key:
-                    process_names.extend(values)
-            
             # If no mapping found, use the app_name directly
-            if not process_names:
-                process_names = [app_name]
+            process_names = _ALIAS_TO_PROCLIST.get(app_name, [app_name])
             
-            # Find and terminate processes
-            terminated = False
-            terminated_names = []
+            # Find matching processes
+            # Exact names are a hash lookup; substring matching is only the fallback
+            exact_names = frozenset(process_names)
+            targets = []
             
             for proc in psutil.process_iter(['pid', 'name']):
+                # Normalize once and keep the lowered name alongside the process
                 proc_name = proc.info['name'].lower()
                 
-                if any(p in proc_name for p in process_names):
-                    try:
-                        proc.terminate()
-                        terminated = True
-                        if proc_name not in terminated_names:
-                            terminated_names.append(proc_name)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                        # Process might have already disappeared or access denied
-                        continue
+                if proc_name in exact_names or any(p in proc_name for p in process_names):
+                    targets.append((proc, proc_name))
+            
+            # Terminate them concurrently, then give them a moment to exit
+            terminated_procs = []
+            if targets:
+                with ThreadPoolExecutor(max_workers=min(8, len(targets))) as executor:
+                    results = list(executor.map(_safe_terminate, (proc for proc, _ in targets)))
+                terminated_procs = [target for target, ok in zip(targets, results) if ok]
+                _, alive = psutil.wait_procs([proc for proc, _ in terminated_procs], timeout=2)
+                if alive:
+                    logger.warning(f"{len(alive)} processes for {app_name} still running after terminate")
+                _invalidate_running_apps_cache()
+            
+            terminated = bool(terminated_procs)
+            terminated_names = []
+            for _, proc_name in terminated_procs:
+                if proc_name not in terminated_names:
+                    terminated_names.append(proc_name)
             
             if terminated:
                 terminated_str = ", ".join(terminated_names)
@@ -292,11 +487,8 @@ class ListRunningAppsTool(BaseTool):
     def _run(self, _: str = "", run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
         """List currently running applications."""
         try:
-            # Check if running in Replit environment
-            is_replit = os.environ.get('REPL_ID') is not None or os.environ.get('REPL_OWNER') is not None
-            
             # If running in Replit environment, return realistic but limited information
-            if is_replit:
+            if _IS_REPLIT:
                 return """Running applications in Replit environment:
 - Flask Web Server (PID: 1)
 - Python Interpreter (PID: 2)
@@ -305,80 +497,11 @@ class ListRunningAppsTool(BaseTool):
 
 Note: This is a limited view as desktop applications cannot be directly accessed in the Replit environment. The full list_running_apps tool is designed to work on local machines."""
             
-            # Dictionary of common process names to display names
-            process_display_map = {
-                "chrome": "Google Chrome",
-                "firefox": "Mozilla Firefox",
-                "msedge": "Microsoft Edge",
-                "safari": "Safari",
-                "notepad": "Notepad",
-                "winword": "Microsoft Word",
-                "excel": "Microsoft Excel",
-                "powerpnt": "Microsoft PowerPoint",
-                "code": "Visual Studio Code",
-                "cmd": "Command Prompt",
-                "powershell": "PowerShell",
-                "explorer": "File Explorer",
-                "calc": "Calculator",
-                "mspaint": "Paint",
-                "itunes": "iTunes",
-                "spotify": "Spotify",
-                "vlc": "VLC Media Player",
-                "photoshop": "Adobe Photoshop",
-                "illustrator": "Adobe Illustrator",
-                "acrobat": "Adobe Acrobat",
-                "teams": "Microsoft Teams",
-                "zoom": "Zoom",
-                "skype": "Skype"
-            }
-            
-            # Get running processes
-            processes = {}
-            for proc in psutil.process_iter(['pid', 'name', 'username']):
-                try:
-                    proc_info = proc.info
-                    proc_name = proc_info['name'].lower()
-                    
-                    # Skip system processes and background processes
-                    if proc_name in ["system", "system idle process", "registry", "smss.exe", "csrss.exe", "wininit.exe"]:
-                        continue
-                    
-                    # Use friendly name if available
-                    display_name = None
-                    for key, value in process_display_map.items():
-                        if key in proc_name:
-                            display_name = value
-                            break
-                    
-                    if not display_name:
-                        display_name = proc_info['name']
-                    
-                    if display_name in processes:
-                        processes[display_name]["count"] += 1
-                    else:
-                        processes[display_name] = {
-                            "count": 1,
-                            "pid": proc_info['pid']
-                        }
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    # Process might have already disappeared or access denied
-                    continue
-            
-            # Format the output
-            if not processes:
-                return "No user applications currently running."
-            
-            output = ["Currently running applications:"]
-            
-            # Sort processes by name
-            sorted_processes = sorted(processes.items(), key=lambda x: x[0].lower())
-            
-            for name, info in sorted_processes:
-                count_str = f" ({info['count']} instances)" if info['count'] > 1 else ""
-                output.append(f"- {name}{count_str} (PID: {info['pid']})")
+            # Reuse a very recent listing instead of enumerating every process again
+            if _LIST_CACHE['value'] and time.monotonic() - _LIST_CACHE['ts'] < _LIST_TTL:
+                return _LIST_CACHE['value']
             
-            return "\n".join(output)
+            return _build_running_apps_listing()
             
         except Exception as e:
             logger.error(f"Error listing running applications: {str(e)}")
@@ -7,12 +7,21 @@ and creating workflow sequences.
 
 import sys
 
+import io
 import os
 import logging
 import time
 import json
+import mmap
 import tempfile
-from typing import Optional, Dict, Any, List
+import collections
+import contextlib
+import functools
+import importlib
+import operator
+import threading
+from dataclasses import dataclass, fields
+from typing import Optional, Dict, Any, List, Callable, ClassVar
 from langchain.tools import BaseTool
 from langchain.callbacks.manager import CallbackManagerForToolRun
 
@@ -31,6 +40,326 @@ def resource_path(relative_path):
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Macro and workflow files go through orjson when it is installed
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Workflow files at least this large are memory-mapped for parsing
+_MMAP_JSON_THRESHOLD = 1024 * 1024
+
+# Buffer size for reading and writing macro and workflow files
+_FS_BUFFER_SIZE = 64 * 1024
+
+
+def _json_dumps(data, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # Data orjson cannot encode (e.g. integers beyond 64 bits)
+            pass
+    return json.dumps(data, indent=2 if indent else None).encode('utf-8')
+
+# Upper bound on buffered events per input device while recording a macro
+_MAX_RECORDED_EVENTS = 200_000
+
+# Mouse moves closer together than one 60 Hz frame are recorded as a single move
+_MOVE_COALESCE_WINDOW = 1 / 60
+
+# Macro events due within this many seconds of each other are played back as one batch
+_PLAYBACK_BATCH_WINDOW = 0.001
+
+# Scheduling priority requested while a macro is played back
+_PLAYBACK_RT_PRIORITY = 10
+_THREAD_PRIORITY_TIME_CRITICAL = 15
+
+# Input automation modules, imported on first use and kept for later calls
+_LAZY_MODULES: Dict[str, Any] = {}
+_LAZY_IMPORT_LOCK = threading.Lock()
+
+
+def _lazy_import(name: str):
+    """
+    Import a module the first time it is needed and return the cached module afterwards.
+    Raises ImportError like a regular import if the module is not installed.
+    """
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        with _LAZY_IMPORT_LOCK:
+            module = _LAZY_MODULES.get(name)
+            if module is None:
+                module = importlib.import_module(name)
+                _LAZY_MODULES[name] = module
+    return module
+
+
+# Pause before simulated input so the user can prepare; workflow steps skip it by default
+_PREPARE_DELAY = 0.5
+_PREPARE_DELAY_TOOLS = frozenset(["keyboard_simulation", "mouse_operation"])
+
+# Screen size reported by pyautogui, refreshed after the TTL so display changes are picked up
+_SCREEN_SIZE_CACHE: Dict[str, Any] = {'ts': 0.0, 'value': None}
+_SCREEN_SIZE_TTL = 5.0
+
+
+def _get_screen_size(pyautogui):
+    """Return the (width, height) of the screen, querying the display at most once per TTL."""
+    now = time.monotonic()
+    if _SCREEN_SIZE_CACHE['value'] is None or now - _SCREEN_SIZE_CACHE['ts'] >= _SCREEN_SIZE_TTL:
+        _SCREEN_SIZE_CACHE['value'] = tuple(pyautogui.size())
+        _SCREEN_SIZE_CACHE['ts'] = now
+    return _SCREEN_SIZE_CACHE['value']
+
+
+# Modules searched for tools that workflow steps can refer to by name
+_WORKFLOW_TOOL_MODULES = (
+    "tools.file_management",
+    "tools.media_content",
+    "tools.network_web",
+    "tools.data_processing",
+    "tools.system_integration",
+    "tools.development",
+    "tools.notifications",
+    "tools.security",
+    "tools.automation",
+    "tools.device_control",
+)
+
+# Tool instances created by workflow execution, keyed by tool name
+_TOOL_INSTANCE_CACHE: Dict[str, BaseTool] = {}
+
+
+def _tool_class_name(tool_class) -> Optional[str]:
+    """Read the default value of a tool class's name field without instantiating it."""
+    fields = getattr(tool_class, "model_fields", None) or getattr(tool_class, "__fields__", {})
+    field = fields.get("name")
+    return getattr(field, "default", None)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_tool_registry() -> Dict[str, type]:
+    """
+    Discover the tool classes available to workflows, mapped by tool name.
+    The module scan only runs once per process.
+    """
+    tool_classes = {}
+    
+    for module_name in _WORKFLOW_TOOL_MODULES:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        
+        for attr_name in dir(module):
+            attr = getattr(module, attr_name)
+            if isinstance(attr, type) and issubclass(attr, BaseTool) and attr is not BaseTool:
+                tool_name = _tool_class_name(attr)
+                if tool_name:
+                    tool_classes[tool_name] = attr
+    
+    return tool_classes
+
+
+def _load_json_file(file_path: str):
+    """
+    Load a JSON document from a file. With orjson, files of _MMAP_JSON_THRESHOLD bytes
+    or more are parsed straight from a memory mapping instead of being read into a copy.
+    """
+    with open(file_path, 'rb', buffering=_FS_BUFFER_SIZE) as f:
+        if orjson is not None and os.fstat(f.fileno()).st_size >= _MMAP_JSON_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+        return _json_loads(f.read())
+
+
+def _ensure_parent_dir(file_path: str) -> None:
+    """Create the directory containing file_path unless it already exists."""
+    parent = os.path.dirname(os.path.abspath(file_path))
+    if parent and not os.path.isdir(parent):
+        os.makedirs(parent, exist_ok=True)
+
+
+@dataclass(slots=True)
+class MacroEvent:
+    """A single recorded keyboard or mouse event; fields that do not apply are None."""
+    type: str
+    event_type: str
+    time: float
+    key: Optional[str] = None
+    x: Optional[int] = None
+    y: Optional[int] = None
+    button: Optional[str] = None
+    wheel_delta: Optional[int] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the event as a dict for saving, leaving out unset fields."""
+        return {name: value for name in _MACRO_EVENT_FIELDS if (value := getattr(self, name)) is not None}
+
+
+_MACRO_EVENT_FIELDS = tuple(field.name for field in fields(MacroEvent))
+
+
+# Recorded mouse buttons that pyautogui can replay
+_PLAYBACK_BUTTONS = frozenset({"left", "right", "middle"})
+
+
+def _from_button_event(event, start_time: float) -> MacroEvent:
+    """Convert a mouse.ButtonEvent into a MacroEvent."""
+    return MacroEvent(type='mouse', event_type=event.event_type, time=event.time - start_time, button=event.button)
+
+
+def _from_wheel_event(event, start_time: float) -> MacroEvent:
+    """Convert a mouse.WheelEvent into a MacroEvent."""
+    return MacroEvent(type='mouse', event_type='scroll', time=event.time - start_time, wheel_delta=event.delta)
+
+
+def _sort_events_by_time(events: List[MacroEvent]) -> List[MacroEvent]:
+    """
+    Return recorded events ordered by their time, keeping the original
+    order of events with equal times. Uses a NumPy argsort when available.
+    """
+    try:
+        import numpy as np
+        times = np.fromiter((event.time for event in events), dtype=np.float64, count=len(events))
+        return [events[i] for i in np.argsort(times, kind='stable').tolist()]
+    except ImportError:
+        return sorted(events, key=operator.attrgetter('time'))
+
+
+def _batch_due_events(events, window: float = _PLAYBACK_BATCH_WINDOW):
+    """
+    Group consecutive macro events that fall due within `window` seconds of the
+    first event in the group, so playback can dispatch them together.
+    """
+    batch = []
+    for event in events:
+        if batch and event.time - batch[0].time >= window:
+            yield batch
+            batch = []
+        batch.append(event)
+    if batch:
+        yield batch
+
+
+@contextlib.contextmanager
+def _playback_priority():
+    """
+    Run the enclosed block at real-time / time-critical thread priority where the
+    OS allows it, restoring the previous priority afterwards. Silently keeps the
+    normal priority if the process lacks permission.
+    """
+    restore = None
+    try:
+        if hasattr(os, "sched_setscheduler"):
+            policy, param = os.sched_getscheduler(0), os.sched_getparam(0)
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(_PLAYBACK_RT_PRIORITY))
+            restore = lambda: os.sched_setscheduler(0, policy, param)
+        elif os.name == "nt":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            thread = kernel32.GetCurrentThread()
+            previous = kernel32.GetThreadPriority(thread)
+            if kernel32.SetThreadPriority(thread, _THREAD_PRIORITY_TIME_CRITICAL):
+                restore = lambda: kernel32.SetThreadPriority(thread, previous)
+    except (OSError, AttributeError):
+        logger.debug("Could not raise macro playback priority", exc_info=True)
+    
+    try:
+        yield
+    finally:
+        if restore is not None:
+            try:
+                restore()
+            except OSError:
+                logger.debug("Could not restore thread priority after playback", exc_info=True)
+
+
+def _iter_macro_events(f):
+    """
+    Yield MacroEvent records from a macro file opened in binary mode, one JSON object per line.
+    Macros saved as a single JSON array by older versions are still accepted.
+    """
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(b'['):
+            for data in _json_loads(line + f.read()):
+                yield MacroEvent(**data)
+            return
+        yield MacroEvent(**_json_loads(line))
+
+
+def _describe_key(event: MacroEvent) -> str:
+    return f"Key {event.event_type}: {event.key}"
+
+
+def _describe_mouse_move(event: MacroEvent) -> str:
+    return f"Mouse move to ({event.x}, {event.y})"
+
+
+def _describe_mouse_click(event: MacroEvent) -> str:
+    if event.x is not None and event.y is not None:
+        return f"Mouse {event.button} click at ({event.x}, {event.y})"
+    return f"Mouse {event.button} click"
+
+
+def _describe_mouse_scroll(event: MacroEvent) -> str:
+    direction = "down" if event.wheel_delta < 0 else "up"
+    return f"Mouse scroll {direction}"
+
+
+def _describe_mouse(event: MacroEvent) -> str:
+    return f"Mouse {event.event_type}"
+
+
+def _describe_unknown(event: MacroEvent) -> str:
+    return f"Unknown event: {event}"
+
+
+# Human-readable descriptions for macro listings, looked up by (type, event_type)
+# first and by type alone as a fallback
+_EVENT_DESCRIBERS = {
+    ('mouse', 'move'): _describe_mouse_move,
+    ('mouse', 'click'): _describe_mouse_click,
+    ('mouse', 'scroll'): _describe_mouse_scroll,
+}
+_TYPE_DESCRIBERS = {
+    'keyboard': _describe_key,
+    'mouse': _describe_mouse,
+}
+
+
+# List of common valid keys in pyautogui
+_VALID_KEYS = frozenset([
+    # Letters
+    'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
+    'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
+    
+    # Numbers
+    '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
+    
+    # Special keys
+    'alt', 'ctrl', 'shift', 'win', 'command', 'option',
+    'enter', 'return', 'tab', 'space', 'backspace', 'delete', 'esc',
+    'escape', 'up', 'down', 'left', 'right', 'home', 'end', 'pageup',
+    'pagedown', 'insert', 'printscreen',
+    
+    # Function keys
+    'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12',
+    
+    # Punctuation
+    '`', '-', '=', '[', ']', '\\', ';', '\'', ',', '.', '/',
+    '~', '!', '@', '#', '$', '%', '^', '&', '*', '(', ')', '_', '+',
+    '{', '}', '|', ':', '"', '<', '>', '?'
+])
+
 class KeyboardSimulationTool(BaseTool):
     """Tool for simulating keyboard inputs."""
     
@@ -43,6 +372,7 @@ class KeyboardSimulationTool(BaseTool):
     For key combinations: {"action": "hotkey", "keys": ["ctrl", "c"]}
     For pressing a single key: {"action": "press", "key": "enter"}
     For sequential key presses: {"action": "sequence", "keys": ["alt", "tab", "tab"]}
+    Optionally add "delay": seconds to wait before acting (default 0.5).
     
     Returns a success message or error.
     
@@ -52,115 +382,114 @@ class KeyboardSimulationTool(BaseTool):
     def _run(self, input_str: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
         """Simulate keyboard inputs."""
         try:
-            import pyautogui
             params = json.loads(input_str)
+        except json.JSONDecodeError:
+            return "Error: Invalid JSON input"
+        
+        return self._run_params(params)
+    
+    def _run_params(self, params: Dict[str, Any]) -> str:
+        """Run the tool with already-parsed input parameters."""
+        try:
+            pyautogui = _lazy_import("pyautogui")
             
             action = params.get("action", "").lower()
             
             if not action:
                 return "Error: Missing action parameter"
             
+            handler = self._ACTIONS.get(action)
+            if handler is None:
+                return f"Error: Unknown action '{action}'. Valid actions are: type, hotkey, press, sequence"
+            
             # Sleep briefly to give user time to prepare
-            time.sleep(0.5)
+            delay = float(params.get("delay", _PREPARE_DELAY))
+            if delay > 0:
+                time.sleep(delay)
             
-            if action == "type":
-                text = params.get("text", "")
-                
-                if not text:
-                    return "Error: Missing text parameter"
+            return handler(self, pyautogui, params)
                 
-                # Type the text
-                pyautogui.write(text)
-                
-                return f"Successfully typed text: '{text}'"
-                
-            elif action == "hotkey":
-                keys = params.get("keys", [])
-                
-                if not keys:
-                    return "Error: Missing keys parameter"
-                
-                # Validate keys
-                for key in keys:
-                    if not self._is_valid_key(key):
-                        return f"Error: Invalid key '{key}'"
-                
-                # Press the hotkey combination
-                pyautogui.hotkey(*keys)
-                
-                return f"Successfully pressed hotkey: {' + '.join(keys)}"
-                
-            elif action == "press":
-                key = params.get("key", "")
-                
-                if not key:
-                    return "Error: Missing key parameter"
-                
-                # Validate key
-                if not self._is_valid_key(key):
-                    return f"Error: Invalid key '{key}'"
-                
-                # Press the key
-                pyautogui.press(key)
-                
-                return f"Successfully pressed key: {key}"
-                
-            elif action == "sequence":
-                keys = params.get("keys", [])
-                
-                if not keys:
-                    return "Error: Missing keys parameter"
-                
-                # Validate keys
-                for key in keys:
-                    if not self._is_valid_key(key):
-                        return f"Error: Invalid key '{key}'"
-                
-                # Press the keys in sequence
-                for key in keys:
-                    pyautogui.press(key)
-                    time.sleep(0.1)  # Small delay between key presses
-                
-                return f"Successfully pressed keys in sequence: {', '.join(keys)}"
-                
-            else:
-                return f"Error: Unknown action '{action}'. Valid actions are: type, hotkey, press, sequence"
-                
-        except json.JSONDecodeError:
-            return "Error: Invalid JSON input"
         except ImportError:
             return "Error: pyautogui module not installed. Install it with 'pip install pyautogui'"
         except Exception as e:
             logger.error(f"Error in keyboard simulation: {str(e)}")
             return f"Error in keyboard simulation: {str(e)}"
     
+    def _type(self, pyautogui, params: Dict[str, Any]) -> str:
+        """Type a string of text."""
+        text = params.get("text", "")
+        
+        if not text:
+            return "Error: Missing text parameter"
+        
+        # Type the text
+        pyautogui.write(text)
+        
+        return f"Successfully typed text: '{text}'"
+    
+    def _hotkey(self, pyautogui, params: Dict[str, Any]) -> str:
+        """Press a key combination."""
+        keys = params.get("keys", [])
+        
+        if not keys:
+            return "Error: Missing keys parameter"
+        
+        # Validate keys
+        for key in keys:
+            if not self._is_valid_key(key):
+                return f"Error: Invalid key '{key}'"
+        
+        # Press the hotkey combination
+        pyautogui.hotkey(*keys)
+        
+        return f"Successfully pressed hotkey: {' + '.join(keys)}"
+    
+    def _press(self, pyautogui, params: Dict[str, Any]) -> str:
+        """Press a single key."""
+        key = params.get("key", "")
+        
+        if not key:
+            return "Error: Missing key parameter"
+        
+        # Validate key
+        if not self._is_valid_key(key):
+            return f"Error: Invalid key '{key}'"
+        
+        # Press the key
+        pyautogui.press(key)
+        
+        return f"Successfully pressed key: {key}"
+    
+    def _sequence(self, pyautogui, params: Dict[str, Any]) -> str:
+        """Press keys one after another."""
+        keys = params.get("keys", [])
+        
+        if not keys:
+            return "Error: Missing keys parameter"
+        
+        # Validate keys
+        for key in keys:
+            if not self._is_valid_key(key):
+                return f"Error: Invalid key '{key}'"
+        
+        # Press the keys in sequence
+        for key in keys:
+            pyautogui.press(key)
+            time.sleep(0.1)  # Small delay between key presses
+        
+        return f"Successfully pressed keys in sequence: {', '.join(keys)}"
+    
+    # Action name -> handler, resolved with a single dict lookup per call
+    _ACTIONS: ClassVar[Dict[str, Callable[..., str]]] = {
+        "type": _type,
+        "hotkey": _hotkey,
+        "press": _press,
+        "sequence": _sequence,
+    }
+    
     def _is_valid_key(self, key: str) -> bool:
         """Check if a key is valid for pyautogui."""
-        # List of common valid keys in pyautogui
-        valid_keys = [
-            # Letters
-            'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
-            'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
-            
-            # Numbers
-            '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
-            
-            # Special keys
-            'alt', 'ctrl', 'shift', 'win', 'command', 'option',
-            'enter', 'return', 'tab', 'space', 'backspace', 'delete', 'esc',
-            'escape', 'up', 'down', 'left', 'right', 'home', 'end', 'pageup',
-            'pagedown', 'insert', 'printscreen',
-            
-            # Function keys
-            'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12',
-            
-            # Punctuation
-            '`', '-', '=', '[', ']', '\\', ';', '\'', ',', '.', '/',
-            '~', '!', '@', '#', '$', '%', '^', '&', '*', '(', ')', '_', '+',
-            '{', '}', '|', ':', '"', '<', '>', '?'
-        ]
-        
-        return key.lower() in valid_keys
+        return key.lower() in _VALID_KEYS
 
 
 class MouseOperationTool(BaseTool):
@@ -176,6 +505,7 @@ class MouseOperationTool(BaseTool):
     For double-clicking: {"action": "doubleclick", "x": 100, "y": 200}
     For dragging: {"action": "drag", "start_x": 100, "start_y": 200, "end_x": 300, "end_y": 400, "duration": 0.5}
     For scrolling: {"action": "scroll", "amount": -10}
+    Optionally add "delay": seconds to wait before acting (default 0.5).
     
     Returns a success message or error.
     
@@ -185,127 +515,152 @@ class MouseOperationTool(BaseTool):
     def _run(self, input_str: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
         """Control mouse operations."""
         try:
-            import pyautogui
             params = json.loads(input_str)
+        except json.JSONDecodeError:
+            return "Error: Invalid JSON input"
+        
+        return self._run_params(params)
+    
+    def _run_params(self, params: Dict[str, Any]) -> str:
+        """Run the tool with already-parsed input parameters."""
+        try:
+            pyautogui = _lazy_import("pyautogui")
             
             action = params.get("action", "").lower()
             
             if not action:
                 return "Error: Missing action parameter"
             
+            handler = self._ACTIONS.get(action)
+            if handler is None:
+                return f"Error: Unknown action '{action}'. Valid actions are: move, click, doubleclick, drag, scroll"
+            
             # Sleep briefly to give user time to prepare
-            time.sleep(0.5)
+            delay = float(params.get("delay", _PREPARE_DELAY))
+            if delay > 0:
+                time.sleep(delay)
             
             # Get screen size for validation
-            screen_width, screen_height = pyautogui.size()
+            screen_width, screen_height = _get_screen_size(pyautogui)
             
-            if action == "move":
-                x = params.get("x")
-                y = params.get("y")
-                duration = params.get("duration", 0.5)
-                
-                if x is None or y is None:
-                    return "Error: Missing x or y parameter"
-                
-                # Validate coordinates
-                if not (0 <= x <= screen_width and 0 <= y <= screen_height):
-                    return f"Error: Coordinates ({x}, {y}) are outside screen boundaries ({screen_width}x{screen_height})"
-                
-                # Move the mouse
-                pyautogui.moveTo(x, y, duration=duration)
-                
-                return f"Successfully moved mouse to coordinates ({x}, {y})"
-                
-            elif action == "click":
-                button = params.get("button", "left").lower()
-                x = params.get("x")
-                y = params.get("y")
-                
-                # Validate button
-                if button not in ["left", "right", "middle"]:
-                    return f"Error: Invalid button '{button}'. Valid buttons are: left, right, middle"
-                
-                if x is not None and y is not None:
-                    # Validate coordinates
-                    if not (0 <= x <= screen_width and 0 <= y <= screen_height):
-                        return f"Error: Coordinates ({x}, {y}) are outside screen boundaries ({screen_width}x{screen_height})"
-                    
-                    # Click at specific coordinates
-                    pyautogui.click(x, y, button=button)
-                    
-                    return f"Successfully clicked {button} button at coordinates ({x}, {y})"
-                else:
-                    # Click at current position
-                    pyautogui.click(button=button)
-                    
-                    current_x, current_y = pyautogui.position()
-                    return f"Successfully clicked {button} button at current position ({current_x}, {current_y})"
-                
-            elif action == "doubleclick":
-                x = params.get("x")
-                y = params.get("y")
-                
-                if x is not None and y is not None:
-                    # Validate coordinates
-                    if not (0 <= x <= screen_width and 0 <= y <= screen_height):
-                        return f"Error: Coordinates ({x}, {y}) are outside screen boundaries ({screen_width}x{screen_height})"
-                    
-                    # Double-click at specific coordinates
-                    pyautogui.doubleClick(x, y)
-                    
-                    return f"Successfully double-clicked at coordinates ({x}, {y})"
-                else:
-                    # Double-click at current position
-                    pyautogui.doubleClick()
-                    
-                    current_x, current_y = pyautogui.position()
-                    return f"Successfully double-clicked at current position ({current_x}, {current_y})"
-                
-            elif action == "drag":
-                start_x = params.get("start_x")
-                start_y = params.get("start_y")
-                end_x = params.get("end_x")
-                end_y = params.get("end_y")
-                duration = params.get("duration", 0.5)
-                
-                if start_x is None or start_y is None or end_x is None or end_y is None:
-                    return "Error: Missing start or end coordinates"
-                
-                # Validate coordinates
-                if not (0 <= start_x <= screen_width and 0 <= start_y <= screen_height):
-                    return f"Error: Start coordinates ({start_x}, {start_y}) are outside screen boundaries ({screen_width}x{screen_height})"
+            return handler(self, pyautogui, params, screen_width, screen_height)
                 
-                if not (0 <= end_x <= screen_width and 0 <= end_y <= screen_height):
-                    return f"Error: End coordinates ({end_x}, {end_y}) are outside screen boundaries ({screen_width}x{screen_height})"
-                
-                # Perform drag operation
-                pyautogui.moveTo(start_x, start_y)
-                pyautogui.dragTo(end_x, end_y, duration=duration)
-                
-                return f"Successfully dragged from ({start_x}, {start_y}) to ({end_x}, {end_y})"
-                
-            elif action == "scroll":
-                amount = params.get("amount")
-                
-                if amount is None:
-                    return "Error: Missing amount parameter"
-                
-                # Scroll the mouse wheel
-                pyautogui.scroll(amount)
-                
-                direction = "down" if amount < 0 else "up"
-                return f"Successfully scrolled {direction} by {abs(amount)} units"
-                
-            else:
-                return f"Error: Unknown action '{action}'. Valid actions are: move, click, doubleclick, drag, scroll"
-                
-        except json.JSONDecodeError:
-            return "Error: Invalid JSON input"
         except ImportError:
             return "Error: pyautogui module not installed. Install it with 'pip install pyautogui'"
         except Exception as e:
             logger.error(f"Error in mouse operation: {str(e)}")
             return f"Error in mouse operation: {str(e)}"
+    
+    def _move(self, pyautogui, params: Dict[str, Any], screen_width: int, screen_height: int) -> str:
+        """Move the mouse to the given coordinates."""
+        x = params.get("x")
+        y = params.get("y")
+        duration = params.get("duration", 0.5)
+        
+        if x is None or y is None:
+            return "Error: Missing x or y parameter"
+        
+        # Validate coordinates
+        if not (0 <= x <= screen_width and 0 <= y <= screen_height):
+            return f"Error: Coordinates ({x}, {y}) are outside screen boundaries ({screen_width}x{screen_height})"
+        
+        # Move the mouse
+        pyautogui.moveTo(x, y, duration=duration)
+        
+        return f"Successfully moved mouse to coordinates ({x}, {y})"
+    
+    def _click(self, pyautogui, params: Dict[str, Any], screen_width: int, screen_height: int) -> str:
+        """Click a mouse button, optionally at given coordinates."""
+        button = params.get("button", "left").lower()
+        x = params.get("x")
+        y = params.get("y")
+        
+        # Validate button
+        if button not in ["left", "right", "middle"]:
+            return f"Error: Invalid button '{button}'. Valid buttons are: left, right, middle"
+        
+        if x is not None and y is not None:
+            # Validate coordinates
+            if not (0 <= x <= screen_width and 0 <= y <= screen_height):
+                return f"Error: Coordinates ({x}, {y}) are outside screen boundaries ({screen_width}x{screen_height})"
+            
+            # Click at specific coordinates
+            pyautogui.click(x, y, button=button)
+            
+            return f"Successfully clicked {button} button at coordinates ({x}, {y})"
+        else:
+            # Click at current position
+            pyautogui.click(button=button)
+            
+            current_x, current_y = pyautogui.position()
+            return f"Successfully clicked {button} button at current position ({current_x}, {current_y})"
+    
+    def _doubleclick(self, pyautogui, params: Dict[str, Any], screen_width: int, screen_height: int) -> str:
+        """Double-click, optionally at given coordinates."""
+        x = params.get("x")
+        y = params.get("y")
+        
+        if x is not None and y is not None:
+            # Validate coordinates
+            if not (0 <= x <= screen_width and 0 <= y <= screen_height):
+                return f"Error: Coordinates ({x}, {y}) are outside screen boundaries ({screen_width}x{screen_height})"
+            
+            # Double-click at specific coordinates
+            pyautogui.doubleClick(x, y)
+            
+            return f"Successfully double-clicked at coordinates ({x}, {y})"
+        else:
+            # Double-click at current position
+            pyautogui.doubleClick()
+            
+            current_x, current_y = pyautogui.position()
+            return f"Successfully double-clicked at current position ({current_x}, {current_y})"
+    
+    def _drag(self, pyautogui, params: Dict[str, Any], screen_width: int, screen_height: int) -> str:
+        """Drag the mouse from one point to another."""
+        start_x = params.get("start_x")
+        start_y = params.get("start_y")
+        end_x = params.get("end_x")
+        end_y = params.get("end_y")
+        duration = params.get("duration", 0.5)
+        
+        if start_x is None or start_y is None or end_x is None or end_y is None:
+            return "Error: Missing start or end coordinates"
+        
+        # Validate coordinates
+        if not (0 <= start_x <= screen_width and 0 <= start_y <= screen_height):
+            return f"Error: Start coordinates ({start_x}, {start_y}) are outside screen boundaries ({screen_width}x{screen_height})"
+        
+        if not (0 <= end_x <= screen_width and 0 <= end_y <= screen_height):
+            return f"Error: End coordinates ({end_x}, {end_y}) are outside screen boundaries ({screen_width}x{screen_height})"
+        
+        # Perform drag operation
+        pyautogui.moveTo(start_x, start_y)
+        pyautogui.dragTo(end_x, end_y, duration=duration)
+        
+        return f"Successfully dragged from ({start_x}, {start_y}) to ({end_x}, {end_y})"
+    
+    def _scroll(self, pyautogui, params: Dict[str, Any], screen_width: int, screen_height: int) -> str:
+        """Scroll the mouse wheel."""
+        amount = params.get("amount")
+        
+        if amount is None:
+            return "Error: Missing amount parameter"
+        
+        # Scroll the mouse wheel
+        pyautogui.scroll(amount)
+        
+        direction = "down" if amount < 0 else "up"
+        return f"Successfully scrolled {direction} by {abs(amount)} units"
+    
+    # Action name -> handler, resolved with a single dict lookup per call
+    _ACTIONS: ClassVar[Dict[str, Callable[..., str]]] = {
+        "move": _move,
+        "click": _click,
+        "doubleclick": _doubleclick,
+        "drag": _drag,
+        "scroll": _scroll,
+    }
 
 
 class MacroRecorderTool(BaseTool):
@@ -328,10 +683,18 @@ class MacroRecorderTool(BaseTool):
     def _run(self, input_str: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
         """Record or play macros."""
         try:
-            import pyautogui
-            import keyboard
-            import mouse
             params = json.loads(input_str)
+        except json.JSONDecodeError:
+            return "Error: Invalid JSON input"
+        
+        return self._run_params(params)
+    
+    def _run_params(self, params: Dict[str, Any]) -> str:
+        """Run the tool with already-parsed input parameters."""
+        try:
+            _lazy_import("pyautogui")
+            _lazy_import("keyboard")
+            _lazy_import("mouse")
             
             action = params.get("action", "").lower()
             file_path = params.get("file_path", "")
@@ -342,66 +705,69 @@ class MacroRecorderTool(BaseTool):
             if not file_path:
                 return "Error: Missing file_path parameter"
             
-            if action == "record":
-                duration = params.get("duration", 10)
-                
-                try:
-                    duration = int(duration)
-                    if duration < 1:
-                        return "Error: Duration must be at least 1 second"
-                    if duration > 60:
-                        return "Error: Duration cannot exceed 60 seconds for safety reasons"
-                except ValueError:
-                    return "Error: Duration must be a number"
-                
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
-                
-                # Record the macro
-                return self._record_macro(duration, file_path)
-                
-            elif action == "play":
-                repeat = params.get("repeat", 1)
-                
-                try:
-                    repeat = int(repeat)
-                    if repeat < 1:
-                        return "Error: Repeat count must be at least 1"
-                    if repeat > 10:
-                        return "Error: Repeat count cannot exceed 10 for safety reasons"
-                except ValueError:
-                    return "Error: Repeat count must be a number"
-                
-                if not os.path.exists(file_path):
-                    return f"Error: Macro file not found: {file_path}"
-                
-                # Play the macro
-                return self._play_macro(file_path, repeat)
-                
-            elif action == "list":
-                if not os.path.exists(file_path):
-                    return f"Error: Macro file not found: {file_path}"
-                
-                # List the macro actions
-                return self._list_macro(file_path)
-                
-            else:
+            handler = self._ACTIONS.get(action)
+            if handler is None:
                 return f"Error: Unknown action '{action}'. Valid actions are: record, play, list"
+            
+            return handler(self, params, file_path)
                 
-        except json.JSONDecodeError:
-            return "Error: Invalid JSON input"
         except ImportError as e:
             return f"Error: Required module not installed: {str(e)}. Install with 'pip install pyautogui keyboard mouse'"
         except Exception as e:
             logger.error(f"Error in macro recorder: {str(e)}")
             return f"Error in macro recorder: {str(e)}"
     
+    def _record(self, params: Dict[str, Any], file_path: str) -> str:
+        """Validate recording parameters and record a macro."""
+        duration = params.get("duration", 10)
+        
+        try:
+            duration = int(duration)
+            if duration < 1:
+                return "Error: Duration must be at least 1 second"
+            if duration > 60:
+                return "Error: Duration cannot exceed 60 seconds for safety reasons"
+        except ValueError:
+            return "Error: Duration must be a number"
+        
+        # Create directory if it doesn't exist
+        _ensure_parent_dir(file_path)
+        
+        # Record the macro
+        return self._record_macro(duration, file_path)
+    
+    def _play(self, params: Dict[str, Any], file_path: str) -> str:
+        """Validate playback parameters and play a macro."""
+        repeat = params.get("repeat", 1)
+        
+        try:
+            repeat = int(repeat)
+            if repeat < 1:
+                return "Error: Repeat count must be at least 1"
+            if repeat > 10:
+                return "Error: Repeat count cannot exceed 10 for safety reasons"
+        except ValueError:
+            return "Error: Repeat count must be a number"
+        
+        if not os.path.exists(file_path):
+            return f"Error: Macro file not found: {file_path}"
+        
+        # Play the macro
+        return self._play_macro(file_path, repeat)
+    
+    def _list(self, params: Dict[str, Any], file_path: str) -> str:
+        """List the actions stored in a macro."""
+        if not os.path.exists(file_path):
+            return f"Error: Macro file not found: {file_path}"
+        
+        # List the macro actions
+        return self._list_macro(file_path)
+    
     def _record_macro(self, duration: int, file_path: str) -> str:
         """Record keyboard and mouse events."""
         try:
-            import keyboard
-            import mouse
-            import time
+            keyboard = _lazy_import("keyboard")
+            mouse = _lazy_import("mouse")
             
             print(f"Recording will start in 3 seconds and last for {duration} seconds...")
             time.sleep(3)
@@ -410,21 +776,20 @@ class MacroRecorderTool(BaseTool):
             recorded_events = []
             start_time = time.time()
             
-            # Setup event recording
-            keyboard_events = []
-            mouse_events = []
+            # Setup event recording: hooks append straight into bounded ring buffers,
+            # which are only drained once recording has finished
+            keyboard_events = collections.deque(maxlen=_MAX_RECORDED_EVENTS)
+            mouse_events = collections.deque(maxlen=_MAX_RECORDED_EVENTS)
             
-            # Record keyboard events
-            keyboard.start_recording()
-            
-            # Record mouse events
+            # Record keyboard and mouse events
+            keyboard.hook(keyboard_events.append)
             mouse.hook(mouse_events.append)
             
             # Wait for the specified duration
             time.sleep(duration)
             
             # Stop recording
-            keyboard_events = keyboard.stop_recording()
+            keyboard.unhook(keyboard_events.append)
             mouse.unhook(mouse_events.append)
             
             print("Recording finished!")
@@ -432,40 +797,58 @@ class MacroRecorderTool(BaseTool):
             # Process keyboard events
             for event in keyboard_events:
                 if event.event_type in ['down', 'up']:
-                    recorded_events.append({
-                        'type': 'keyboard',
-                        'event_type': event.event_type,
-                        'key': event.name,
-                        'time': event.time - start_time
-                    })
-            
-            # Process mouse events
+                    recorded_events.append(MacroEvent(
+                        type='keyboard',
+                        event_type=event.event_type,
+                        time=event.time - start_time,
+                        key=event.name
+                    ))
+            
+            # Process mouse events by their event class, collapsing each run of moves
+            # that falls within one frame into a single move to the final position
+            adapters = {
+                mouse.ButtonEvent: _from_button_event,
+                mouse.WheelEvent: _from_wheel_event,
+            }
+            move_event_class = mouse.MoveEvent
+            last_move = None
+            move_run_start = 0.0
+            
             for event in mouse_events:
-                if hasattr(event, 'event_type'):
-                    event_data = {
-                        'type': 'mouse',
-                        'event_type': event.event_type,
-                        'time': event.time - start_time
-                    }
-                    
-                    if hasattr(event, 'button'):
-                        event_data['button'] = event.button
-                    
-                    if hasattr(event, 'x') and hasattr(event, 'y'):
-                        event_data['x'] = event.x
-                        event_data['y'] = event.y
+                event_class = type(event)
+                
+                if event_class is move_event_class:
+                    event_time = event.time - start_time
                     
-                    if hasattr(event, 'wheel_delta'):
-                        event_data['wheel_delta'] = event.wheel_delta
+                    if last_move is not None and event_time - move_run_start < _MOVE_COALESCE_WINDOW:
+                        last_move.x = event.x
+                        last_move.y = event.y
+                        last_move.time = event_time
+                    else:
+                        last_move = MacroEvent(
+                            type='mouse',
+                            event_type='move',
+                            time=event_time,
+                            x=event.x,
+                            y=event.y
+                        )
+                        move_run_start = event_time
+                        recorded_events.append(last_move)
                     
-                    recorded_events.append(event_data)
+                else:
+                    adapter = adapters.get(event_class)
+                    if adapter is not None:
+                        last_move = None
+                        recorded_events.append(adapter(event, start_time))
             
             # Sort events by time
-            recorded_events.sort(key=lambda e: e['time'])
+            recorded_events = _sort_events_by_time(recorded_events)
             
-            # Save the recorded macro
-            with open(file_path, 'w') as f:
-                json.dump(recorded_events, f, indent=2)
+            # Save the recorded macro, one JSON event per line, serialized up front so
+            # the file is written with a single call
+            data = b"".join(_json_dumps(event.to_dict()) + b"\n" for event in recorded_events)
+            with open(file_path, 'wb', buffering=_FS_BUFFER_SIZE) as f:
+                f.write(data)
             
             return f"Successfully recorded {len(recorded_events)} events to {file_path}"
             
@@ -475,53 +858,74 @@ class MacroRecorderTool(BaseTool):
     def _play_macro(self, file_path: str, repeat: int) -> str:
         """Play back recorded macro events."""
         try:
-            import pyautogui
-            import keyboard
-            import mouse
-            import time
+            pyautogui = _lazy_import("pyautogui")
+            keyboard = _lazy_import("keyboard")
             
-            # Load the macro
-            with open(file_path, 'r') as f:
-                events = json.load(f)
+            # Events are streamed from the file on the first pass and kept for repeats
+            events = []
             
-            print(f"Playback will start in 3 seconds and repeat {repeat} times...")
-            time.sleep(3)
-            print("Playback started!")
+            # pyautogui sleeps for PAUSE seconds after every call; playback is timed
+            # by the recorded deadlines instead, so the pause is disabled meanwhile
+            pause = pyautogui.PAUSE
+            pyautogui.PAUSE = 0
             
-            for i in range(repeat):
-                if i > 0:
-                    print(f"Starting repetition {i+1}...")
-                    time.sleep(1)
-                
-                last_event_time = 0
-                
-                for event in events:
-                    # Wait for the appropriate time
-                    event_time = event['time']
-                    time_to_wait = event_time - last_event_time
-                    
-                    if time_to_wait > 0:
-                        time.sleep(time_to_wait)
+            try:
+                with open(file_path, 'rb', buffering=_FS_BUFFER_SIZE) as f:
+                    print(f"Playback will start in 3 seconds and repeat {repeat} times...")
+                    time.sleep(3)
+                    print("Playback started!")
                     
-                    # Execute the event
-                    if event['type'] == 'keyboard':
-                        if event['event_type'] == 'down':
-                            keyboard.press(event['key'])
-                        elif event['event_type'] == 'up':
-                            keyboard.release(event['key'])
-                    
-                    elif event['type'] == 'mouse':
-                        if event['event_type'] == 'move':
-                            pyautogui.moveTo(event['x'], event['y'])
-                        elif event['event_type'] == 'click':
-                            if 'x' in event and 'y' in event:
-                                pyautogui.click(event['x'], event['y'], button=event['button'])
-                            else:
-                                pyautogui.click(button=event['button'])
-                        elif event['event_type'] == 'scroll':
-                            pyautogui.scroll(event['wheel_delta'])
-                    
-                    last_event_time = event_time
+                    with _playback_priority():
+                        for i in range(repeat):
+                            if i > 0:
+                                print(f"Starting repetition {i+1}...")
+                                time.sleep(1)
+                            
+                            # Events are scheduled against absolute deadlines from the start
+                            # of the repetition, so sleep overshoot does not accumulate
+                            start_time = time.perf_counter()
+                            
+                            for batch in _batch_due_events(_iter_macro_events(f) if i == 0 else events):
+                                if i == 0:
+                                    events.extend(batch)
+                                
+                                # Wait once for the whole batch, then send its events back to back
+                                time_to_wait = start_time + batch[0].time - time.perf_counter()
+                                
+                                if time_to_wait > 0:
+                                    time.sleep(time_to_wait)
+                                
+                                for event in batch:
+                                    # Execute the event
+                                    if event.type == 'keyboard':
+                                        if event.event_type == 'down':
+                                            keyboard.press(event.key)
+                                        elif event.event_type == 'up':
+                                            keyboard.release(event.key)
+                                    
+                                    elif event.type == 'mouse':
+                                        if event.event_type == 'move':
+                                            pyautogui.moveTo(event.x, event.y)
+                                        elif event.event_type == 'scroll':
+                                            pyautogui.scroll(event.wheel_delta)
+                                        elif event.button is not None and event.button not in _PLAYBACK_BUTTONS:
+                                            # Side buttons (x, x2) have no pyautogui equivalent
+                                            continue
+                                        elif event.event_type == 'click':
+                                            if event.x is not None and event.y is not None:
+                                                pyautogui.click(event.x, event.y, button=event.button)
+                                            else:
+                                                pyautogui.click(button=event.button)
+                                        elif event.event_type == 'down':
+                                            pyautogui.mouseDown(button=event.button)
+                                        elif event.event_type == 'up':
+                                            pyautogui.mouseUp(button=event.button)
+                                        elif event.event_type == 'double':
+                                            # mouse records a double click as down, up, double, up:
+                                            # 'double' stands in for the second press
+                                            pyautogui.mouseDown(button=event.button)
+            finally:
+                pyautogui.PAUSE = pause
             
             print("Playback finished!")
             
@@ -535,45 +939,33 @@ class MacroRecorderTool(BaseTool):
     def _list_macro(self, file_path: str) -> str:
         """List actions in a macro file."""
         try:
-            # Load the macro
-            with open(file_path, 'r') as f:
-                events = json.load(f)
+            # Format the events for display as they are read from the file
+            buffer = io.StringIO()
+            write = buffer.write
+            count = 0
             
-            if not events:
-                return f"The macro file {file_path} contains no events"
+            with open(file_path, 'rb', buffering=_FS_BUFFER_SIZE) as f:
+                for count, event in enumerate(_iter_macro_events(f), 1):
+                    describe = (_EVENT_DESCRIBERS.get((event.type, event.event_type))
+                                or _TYPE_DESCRIBERS.get(event.type, _describe_unknown))
+                    write(f"\n{count}. [{event.time:.2f}s] {describe(event)}")
             
-            # Format the events for display
-            event_descriptions = []
-            
-            for i, event in enumerate(events):
-                time_str = f"{event['time']:.2f}s"
-                
-                if event['type'] == 'keyboard':
-                    action = f"Key {event['event_type']}: {event['key']}"
-                elif event['type'] == 'mouse':
-                    if event['event_type'] == 'move':
-                        action = f"Mouse move to ({event['x']}, {event['y']})"
-                    elif event['event_type'] == 'click':
-                        if 'x' in event and 'y' in event:
-                            action = f"Mouse {event['button']} click at ({event['x']}, {event['y']})"
-                        else:
-                            action = f"Mouse {event['button']} click"
-                    elif event['event_type'] == 'scroll':
-                        direction = "down" if event['wheel_delta'] < 0 else "up"
-                        action = f"Mouse scroll {direction}"
-                    else:
-                        action = f"Mouse {event['event_type']}"
-                else:
-                    action = f"Unknown event: {event}"
-                
-                event_descriptions.append(f"{i+1}. [{time_str}] {action}")
+            if not count:
+                return f"The macro file {file_path} contains no events"
             
-            return f"Macro events in {file_path} ({len(events)} events):\n" + "\n".join(event_descriptions)
+            return f"Macro events in {file_path} ({count} events):" + buffer.getvalue()
             
         except json.JSONDecodeError:
             return f"Error: The macro file {file_path} contains invalid JSON"
         except Exception as e:
             return f"Error listing macro: {str(e)}"
+    
+    # Action name -> handler, resolved with a single dict lookup per call
+    _ACTIONS: ClassVar[Dict[str, Callable[..., str]]] = {
+        "record": _record,
+        "play": _play,
+        "list": _list,
+    }
 
 
 class WorkflowAutomationTool(BaseTool):
@@ -587,6 +979,7 @@ class WorkflowAutomationTool(BaseTool):
     For creating a workflow: {"action": "create", "file_path": "path/to/workflow.json", "steps": [{"tool": "keyboard_simulation", "params": {"action": "type", "text": "Hello"}}, ...]}
     For executing a workflow: {"action": "execute", "file_path": "path/to/workflow.json"}
     For listing steps in a workflow: {"action": "list", "file_path": "path/to/workflow.json"}
+    For listing steps with indented parameters: {"action": "pretty_list", "file_path": "path/to/workflow.json"}
     
     Returns a success message or error.
     
@@ -597,7 +990,14 @@ class WorkflowAutomationTool(BaseTool):
         """Create or execute workflow sequences."""
         try:
             params = json.loads(input_str)
-            
+        except json.JSONDecodeError:
+            return "Error: Invalid JSON input"
+        
+        return self._run_params(params)
+    
+    def _run_params(self, params: Dict[str, Any]) -> str:
+        """Run the tool with already-parsed input parameters."""
+        try:
             action = params.get("action", "").lower()
             file_path = params.get("file_path", "")
             
@@ -607,121 +1007,125 @@ class WorkflowAutomationTool(BaseTool):
             if not file_path:
                 return "Error: Missing file_path parameter"
             
-            if action == "create":
-                steps = params.get("steps", [])
-                
-                if not steps:
-                    return "Error: Missing or empty steps parameter"
-                
-                # Validate steps
-                for i, step in enumerate(steps):
-                    if "tool" not in step:
-                        return f"Error: Missing tool name in step {i+1}"
-                    if "params" not in step:
-                        return f"Error: Missing params in step {i+1}"
-                
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
-                
-                # Save the workflow
-                with open(file_path, 'w') as f:
-                    json.dump(steps, f, indent=2)
-                
-                return f"Successfully created workflow with {len(steps)} steps in {file_path}"
-                
-            elif action == "execute":
-                if not os.path.exists(file_path):
-                    return f"Error: Workflow file not found: {file_path}"
-                
-                # Load the workflow
-                with open(file_path, 'r') as f:
-                    steps = json.load(f)
-                
-                if not steps:
-                    return f"Error: Workflow file {file_path} contains no steps"
-                
-                # Import necessary tools
-                import importlib
-                from langchain.tools import BaseTool
-                
-                # Get all tool classes from the windows_agent_tools modules
-                tool_classes = {}
-                
-                # Import modules dynamically
-                modules = [
-                    "windows_agent_tools.file_management",
-                    "windows_agent_tools.media_content",
-                    "windows_agent_tools.network_web",
-                    "windows_agent_tools.data_processing",
-                    "windows_agent_tools.system_integration",
-                    "windows_agent_tools.development",
-                    "windows_agent_tools.notifications",
-                    "windows_agent_tools.security",
-                    "windows_agent_tools.automation",
-                    "windows_agent_tools.device_control"
-                ]
-                
-                for module_name in modules:
-                    try:
-                        module = importlib.import_module(module_name)
-                        for attr_name in dir(module):
-                            attr = getattr(module, attr_name)
-                            if isinstance(attr, type) and issubclass(attr, BaseTool) and attr != BaseTool:
-                                tool_classes[attr().name] = attr
-                    except ImportError:
-                        pass
-                
-                # Execute each step
-                results = []
-                
-                for i, step in enumerate(steps):
-                    tool_name = step.get("tool")
-                    params = step.get("params", {})
-                    
-                    # Check if we have the tool
-                    if tool_name not in tool_classes:
-                        results.append(f"Error in step {i+1}: Tool '{tool_name}' not found")
-                        continue
-                    
-                    # Create an instance of the tool
-                    tool_instance = tool_classes[tool_name]()
-                    
-                    # Execute the tool
-                    try:
-                        result = tool_instance._run(json.dumps(params))
-                        results.append(f"Step {i+1}: {result}")
-                    except Exception as e:
-                        results.append(f"Error in step {i+1}: {str(e)}")
-                
-                return f"Workflow execution results for {file_path}:\n\n" + "\n\n".join(results)
-                
-            elif action == "list":
-                if not os.path.exists(file_path):
-                    return f"Error: Workflow file not found: {file_path}"
-                
-                # Load the workflow
-                with open(file_path, 'r') as f:
-                    steps = json.load(f)
-                
-                if not steps:
-                    return f"The workflow file {file_path} contains no steps"
-                
-                # Format the steps for display
-                step_descriptions = []
-                
-                for i, step in enumerate(steps):
-                    tool_name = step.get("tool", "unknown")
-                    params = step.get("params", {})
-                    
-                    step_descriptions.append(f"{i+1}. Tool: {tool_name}\n   Parameters: {json.dumps(params, indent=3)}")
-                
-                return f"Workflow steps in {file_path} ({len(steps)} steps):\n\n" + "\n\n".join(step_descriptions)
-                
-            else:
-                return f"Error: Unknown action '{action}'. Valid actions are: create, execute, list"
+            handler = self._ACTIONS.get(action)
+            if handler is None:
+                return f"Error: Unknown action '{action}'. Valid actions are: create, execute, list, pretty_list"
+            
+            return handler(self, params, file_path)
                 
         except json.JSONDecodeError:
             return "Error: Invalid JSON input"
         except Exception as e:
             logger.error(f"Error in workflow automation: {str(e)}")
             return f"Error in workflow automation: {str(e)}"
+    
+    def _create(self, params: Dict[str, Any], file_path: str) -> str:
+        """Validate and save a new workflow."""
+        steps = params.get("steps", [])
+        
+        if not steps:
+            return "Error: Missing or empty steps parameter"
+        
+        # Validate steps
+        for i, step in enumerate(steps):
+            if "tool" not in step:
+                return f"Error: Missing tool name in step {i+1}"
+            if "params" not in step:
+                return f"Error: Missing params in step {i+1}"
+            if not isinstance(step["params"], dict):
+                return f"Error: Params in step {i+1} must be a JSON object"
+        
+        # Create directory if it doesn't exist
+        _ensure_parent_dir(file_path)
+        
+        # Save the workflow
+        with open(file_path, 'wb', buffering=_FS_BUFFER_SIZE) as f:
+            f.write(_json_dumps(steps, indent=True))
+        
+        return f"Successfully created workflow with {len(steps)} steps in {file_path}"
+    
+    def _execute(self, params: Dict[str, Any], file_path: str) -> str:
+        """Run each step of a saved workflow."""
+        if not os.path.exists(file_path):
+            return f"Error: Workflow file not found: {file_path}"
+        
+        # Load the workflow
+        steps = _load_json_file(file_path)
+        
+        if not steps:
+            return f"Error: Workflow file {file_path} contains no steps"
+        
+        # Tool classes by name, discovered once per process
+        tool_classes = _get_tool_registry()
+        
+        # Execute each step
+        results = []
+        
+        for i, step in enumerate(steps):
+            tool_name = step.get("tool")
+            params = step.get("params", {})
+            
+            # Check if we have the tool
+            if tool_name not in tool_classes:
+                results.append(f"Error in step {i+1}: Tool '{tool_name}' not found")
+                continue
+            
+            # Reuse a single instance of each tool across steps and workflows
+            tool_instance = _TOOL_INSTANCE_CACHE.get(tool_name)
+            if tool_instance is None:
+                tool_instance = _TOOL_INSTANCE_CACHE[tool_name] = tool_classes[tool_name]()
+            
+            # Scripted steps run back to back unless the step asks for a delay; params that
+            # aren't an object are passed on untouched for the tool to reject as before
+            if tool_name in _PREPARE_DELAY_TOOLS and isinstance(params, dict) and "delay" not in params:
+                params = {**params, "delay": 0}
+            
+            # Execute the tool, handing the parsed params straight to tools that accept them
+            try:
+                run_params = getattr(tool_instance, "_run_params", None)
+                if run_params is not None:
+                    result = run_params(params)
+                else:
+                    result = tool_instance._run(json.dumps(params))
+                results.append(f"Step {i+1}: {result}")
+            except Exception as e:
+                results.append(f"Error in step {i+1}: {str(e)}")
+        
+        return f"Workflow execution results for {file_path}:\n\n" + "\n\n".join(results)
+    
+    def _list(self, params: Dict[str, Any], file_path: str) -> str:
+        """Describe the steps of a saved workflow with compact parameters."""
+        return self._describe_steps(file_path, pretty=False)
+    
+    def _pretty_list(self, params: Dict[str, Any], file_path: str) -> str:
+        """Describe the steps of a saved workflow with indented parameters."""
+        return self._describe_steps(file_path, pretty=True)
+    
+    def _describe_steps(self, file_path: str, pretty: bool) -> str:
+        """Format the steps of a saved workflow for display."""
+        if not os.path.exists(file_path):
+            return f"Error: Workflow file not found: {file_path}"
+        
+        # Load the workflow
+        steps = _load_json_file(file_path)
+        
+        if not steps:
+            return f"The workflow file {file_path} contains no steps"
+        
+        # Format the steps for display; the indented form goes through the slower
+        # pure-Python encoder, so it is only used when asked for
+        dump_kwargs = {"indent": 3} if pretty else {"separators": (',', ':')}
+        step_descriptions = [
+            f"{i+1}. Tool: {step.get('tool', 'unknown')}\n   Parameters: {json.dumps(step.get('params', {}), **dump_kwargs)}"
+            for i, step in enumerate(steps)
+        ]
+        
+        return f"Workflow steps in {file_path} ({len(steps)} steps):\n\n" + "\n\n".join(step_descriptions)
+    
+    # Action name -> handler, resolved with a single dict lookup per call
+    _ACTIONS: ClassVar[Dict[str, Callable[..., str]]] = {
+        "create": _create,
+        "execute": _execute,
+        "list": _list,
+        "pretty_list": _pretty_list,
+    }
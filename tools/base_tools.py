@@ -5,6 +5,8 @@ Base functionality for file system tools.
 import sys
 
 import os
+import re
+import functools
 import logging
 import platform
 import subprocess
@@ -16,17 +18,23 @@ from pathlib import Path
 from langchain.tools import BaseTool
 from langchain.callbacks.manager import CallbackManagerForToolRun
 
+# Selenium is optional; only the browser tools, which need it anyway, call is_session_lost
+try:
+    from selenium.common.exceptions import (
+        WebDriverException, InvalidSessionIdException, NoSuchWindowException
+    )
+except ImportError:
+    WebDriverException = None
+
+# PyInstaller creates a temp folder and stores path in _MEIPASS
+_BASE_PATH = getattr(sys, '_MEIPASS', None) or os.path.abspath(".")
+
+
 def resource_path(relative_path):
     """
     Get absolute path to resource, works for dev and for PyInstaller
     """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    
-    return os.path.join(base_path, relative_path)
+    return os.path.join(_BASE_PATH, relative_path)
 
 
 # Configure logger
@@ -41,6 +49,11 @@ def setup_fs_logger(level=logging.INFO):
     logger.setLevel(level)
     return logger
 
+@functools.lru_cache(maxsize=128)
+def _resolved_base(base_path: str) -> str:
+    """Resolve a base directory to its canonical absolute path."""
+    return os.path.realpath(os.path.expanduser(base_path))
+
 def safe_path_join(base_path: str, *paths: str) -> str:
     """
     Safely join paths to prevent directory traversal attacks.
@@ -52,18 +65,31 @@ def safe_path_join(base_path: str, *paths: str) -> str:
     Returns:
         The joined path restricted to base_path or its subdirectories
     """
-    base_path = os.path.abspath(os.path.expanduser(base_path))
+    # Relative bases depend on the current directory, so only absolute ones are cached
+    if os.path.isabs(base_path) or base_path.startswith('~'):
+        base_path = _resolved_base(base_path)
+    else:
+        base_path = os.path.realpath(base_path)
     joined_path = os.path.normpath(os.path.join(base_path, *paths))
     
-    # Ensure the resulting path is within the base_path
-    if not joined_path.startswith(base_path):
+    # Ensure the resulting path is within the base_path; a component-wise comparison
+    # so that e.g. /foobar is not accepted as being inside /foo
+    try:
+        inside = os.path.commonpath([base_path, joined_path]) == base_path
+    except ValueError:
+        # Paths on different drives
+        inside = False
+    if not inside:
         raise ValueError(f"Security error: Path would escape base directory: {joined_path}")
         
     return joined_path
 
+# Bytes inspected by is_binary_file, the same probe size file(1) historically used
+_BINARY_PROBE_SIZE = 512
+
 def is_binary_file(file_path: str) -> bool:
     """
-    Check if a file is binary by reading its first few kilobytes.
+    Check if a file is binary by looking for a NUL byte in its first 512 bytes.
     
     Args:
         file_path: Path to the file to check
@@ -72,13 +98,47 @@ def is_binary_file(file_path: str) -> bool:
         True if file appears to be binary, False otherwise
     """
     try:
-        with open(file_path, 'rb') as file:
-            chunk = file.read(4096)
-            return b'\x00' in chunk  # A simple heuristic for binary files
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            chunk = os.read(fd, _BINARY_PROBE_SIZE)
+        finally:
+            os.close(fd)
+        return chunk.find(b'\x00') != -1  # A simple heuristic for binary files
     except Exception as e:
         logger.error(f"Error checking if file is binary: {str(e)}")
         return False
 
+# BeautifulSoup parser for the web tools: the C-based lxml when it is installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Messages of a plain WebDriverException that mean the browser itself has gone away
+_SESSION_LOST_MARKERS = ("chrome not reachable", "disconnected", "session deleted", "no such session")
+
+def is_session_lost(error: Exception) -> bool:
+    """
+    Check whether a Selenium error means the browser session is unusable, not just the page.
+    
+    Args:
+        error: Exception raised by a WebDriver call
+        
+    Returns:
+        True for a lost session, closed window or unreachable browser; False for page-level
+        errors such as stale elements, intercepted clicks or script errors
+    """
+    if WebDriverException is None:
+        return False
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    # Subclasses (stale element, intercepted click, script errors, ...) leave the session intact
+    if type(error) is not WebDriverException:
+        return False
+    message = (error.msg or "").lower()
+    return any(marker in message for marker in _SESSION_LOST_MARKERS)
+
 def handle_file_operation_error(operation: str) -> Callable:
     """
     Decorator for handling file operation errors.
@@ -111,6 +171,18 @@ def handle_file_operation_error(operation: str) -> Callable:
         return wrapper
     return decorator
 
+# Compiled "field: value" patterns used by parse_json_input's plain-text fallback
+_FIELD_PATTERN_CACHE: Dict[str, re.Pattern] = {}
+
+def _get_field_re(field: str) -> re.Pattern:
+    """Return the compiled pattern that extracts a field's value from loosely formatted input."""
+    pattern = _FIELD_PATTERN_CACHE.get(field)
+    if pattern is None:
+        pattern = _FIELD_PATTERN_CACHE.setdefault(
+            field, re.compile(rf"{re.escape(field)}['\"]?\s*[:=]\s*['\"]?([^'\",:}}\]]+)['\"]?")
+        )
+    return pattern
+
 def parse_json_input(input_str: str, required_fields: List[str]) -> Dict[str, Any]:
     """
     Parse JSON input string and validate required fields.
@@ -131,10 +203,9 @@ def parse_json_input(input_str: str, required_fields: List[str]) -> Dict[str, An
             data = json.loads(input_str)
         except json.JSONDecodeError:
             # If not valid JSON, try to extract fields from string
-            import re
             data = {}
             for field in required_fields:
-                match = re.search(rf"{field}['\"]?\s*[:=]\s*['\"]?([^'\",:}}\]]+)['\"]?", input_str)
+                match = _get_field_re(field).search(input_str)
                 if match:
                     data[field] = match.group(1).strip()
         
@@ -3,54 +3,333 @@ Tools for the AI agent to interact with web browsers.
 Includes operations for opening browsers, visiting websites, and interacting with web pages.
 """
 
-import sys
-
-import os
+import re
+import json
+import time
+import atexit
+import collections
+import contextlib
 import logging
+import threading
 import webbrowser
 import requests
-from typing import Optional, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, Callable, ClassVar
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from langchain.callbacks.manager import CallbackManagerForToolRun
 from langchain.tools.base import BaseTool
-
-def resource_path(relative_path):
-    """
-    Get absolute path to resource, works for dev and for PyInstaller
-    """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    
-    return os.path.join(base_path, relative_path)
+from tools.base_tools import resource_path, is_session_lost, HTML_PARSER
 
 
 logger = logging.getLogger(__name__)
 
+# Characters of page text returned to the agent, and how much text the converters
+# collect before stopping (enough to tell whether the output was truncated)
+_MAX_TEXT_LENGTH = 2000
+_TEXT_COLLECT_LIMIT = 2 * _MAX_TEXT_LENGTH
+
 try:
     import html2text
+    
+    class _BoundedHTML2Text(html2text.HTML2Text):
+        """HTML2Text preconfigured for page excerpts that stops collecting output after
+        _TEXT_COLLECT_LIMIT characters.
+        
+        Parser state (e.g. an unclosed blockquote) carries over between handle() calls,
+        so use a fresh instance per page.
+        """
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.ignore_links = False
+            self.ignore_images = True
+            self.ignore_emphasis = True
+            self.body_width = 0
+        
+        def handle(self, data: str) -> str:
+            self._collected = 0
+            return super().handle(data)
+        
+        def outtextf(self, s: str) -> None:
+            if self._collected <= _TEXT_COLLECT_LIMIT:
+                self._collected += len(s)
+                super().outtextf(s)
+    
     HTML2TEXT_AVAILABLE = True
 except ImportError:
     logger.warning("html2text not available. Text conversion will be limited.")
     HTML2TEXT_AVAILABLE = False
 
+# Only the first part of a page is fetched; the extracted text is truncated anyway
+_MAX_PAGE_BYTES = 256 * 1024
+
+# Characters of HTML handed to the text converters: 100x the 2000-character output limit,
+# which leaves enough slack for markup-heavy pages to still yield a full excerpt
+_MAX_HTML_CHARS = 200_000
+
+# Pages at least this large (in characters) skip html2text in favour of BeautifulSoup
+_HTML2TEXT_MAX_SIZE = 50 * 1024
+
 try:
     from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.chrome.service import Service
     from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+    # Locator strategy for each supported selector_type
+    _BY_METHODS = {"css": By.CSS_SELECTOR, "xpath": By.XPATH}
     SELENIUM_AVAILABLE = True
 except ImportError:
     logger.warning("Selenium not available. Advanced browser interactions will be limited.")
     SELENIUM_AVAILABLE = False
 
 
+# Bound once for parsing tool input
+_json_loads = json.loads
+
+# Scroll-and-click and set-and-notify each run as one script, costing a single
+# WebDriver round trip instead of two or three
+_SCROLL_AND_CLICK_JS = "arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();"
+# The value goes through the native prototype setter because controlled inputs (e.g. React)
+# wrap the element's own value setter and ignore a plain assignment
+_SET_VALUE_JS = (
+    "var el = arguments[0];"
+    "el.scrollIntoView({block: 'center'});"
+    "el.focus();"
+    "var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype"
+    " : el instanceof HTMLSelectElement ? HTMLSelectElement.prototype"
+    " : el instanceof HTMLInputElement ? HTMLInputElement.prototype : null;"
+    "var setter = proto && Object.getOwnPropertyDescriptor(proto, 'value').set;"
+    "if (setter) { setter.call(el, arguments[1]); } else { el.value = arguments[1]; }"
+    "el.dispatchEvent(new Event('input', {bubbles: true}));"
+    "el.dispatchEvent(new Event('change', {bubbles: true}));"
+)
+
+# One "key: value" pair in loosely formatted tool input; the value may be double-quoted,
+# single-quoted or bare
+_KV_PAIR_RE = re.compile(r"""['"]?([A-Za-z_]+)['"]?\s*[:=]\s*(?:"([^"]*)"|'([^']*)'|([^,}\s]+))""")
+
+
+def _tolerant_kv_parse(text: str, allowed_keys: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Extract key/value pairs from input that is not valid JSON in a single scan.
+    Only keys in allowed_keys are kept; the first occurrence of a key wins.
+    """
+    data = {}
+    for match in _KV_PAIR_RE.finditer(text):
+        key = match.group(1)
+        if key in allowed_keys and key not in data:
+            double_quoted, single_quoted, bare = match.group(2, 3, 4)
+            data[key] = double_quoted if double_quoted is not None else (
+                single_quoted if single_quoted is not None else bare)
+    return data
+
+
+# Shared HTTP session so repeated fetches reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_HTTP_ADAPTER = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+_SESSION.mount("https://", _HTTP_ADAPTER)
+_SESSION.mount("http://", _HTTP_ADAPTER)
+
+
+def _read_capped_text(response, max_bytes: int) -> str:
+    """
+    Read up to max_bytes of a streamed requests response body and decode it,
+    without downloading the rest of the page.
+    """
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            break
+    raw = b"".join(chunks)[:max_bytes]
+    
+    try:
+        return raw.decode(response.encoding or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown charset announced by the server
+        return raw.decode("utf-8", errors="replace")
+
+
+# Recently fetched page text by URL, with the validators needed to revalidate it
+_PAGE_CACHE = collections.OrderedDict()
+_PAGE_CACHE_MAX_ENTRIES = 64
+_PAGE_CACHE_LOCK = threading.Lock()
+
+
+def _page_cache_get(url: str) -> Optional[Dict[str, Any]]:
+    """Return the cached entry for url, marking it as most recently used."""
+    with _PAGE_CACHE_LOCK:
+        entry = _PAGE_CACHE.get(url)
+        if entry is not None:
+            _PAGE_CACHE.move_to_end(url)
+        return entry
+
+
+def _page_cache_put(url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+    """Store page text for url, evicting the least recently used entry when full."""
+    with _PAGE_CACHE_LOCK:
+        _PAGE_CACHE[url] = {
+            'text': text,
+            'etag': etag,
+            'last_modified': last_modified,
+            'ts': time.time(),
+        }
+        _PAGE_CACHE.move_to_end(url)
+        while len(_PAGE_CACHE) > _PAGE_CACHE_MAX_ENTRIES:
+            _PAGE_CACHE.popitem(last=False)
+
+
+# Headless Chrome shared by the Selenium tools, started on first use; the lock is held
+# for a whole tool interaction so concurrent calls don't drive the same session at once
+_DRIVER = None
+_DRIVER_LOCK = threading.RLock()
+
+def _get_driver():
+    """Return the shared headless Chrome WebDriver, starting it if needed."""
+    global _DRIVER
+    with _DRIVER_LOCK:
+        if _DRIVER is None:
+            options = Options()
+            options.add_argument("--headless=new")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-dev-shm-usage")
+            
+            driver = webdriver.Chrome(options=options)
+            driver.set_page_load_timeout(30)
+            _DRIVER = driver
+        return _DRIVER
+
+
+def _quit_driver() -> bool:
+    """Shut down the shared WebDriver. Returns False if no browser was running."""
+    global _DRIVER
+    with _DRIVER_LOCK:
+        driver, _DRIVER = _DRIVER, None
+    if driver is None:
+        return False
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.error(f"Error closing WebDriver: {str(e)}")
+    return True
+
+
+atexit.register(_quit_driver)
+
+
+@contextlib.contextmanager
+def _browser_session():
+    """Hold the shared WebDriver for one tool interaction."""
+    with _DRIVER_LOCK:
+        yield _get_driver()
+
+
+def _leading_text(strings, limit: int) -> str:
+    """Join strings with newlines, stopping once more than limit characters are collected."""
+    parts = []
+    total = 0
+    for text in strings:
+        parts.append(text)
+        total += len(text) + 1
+        if total > limit:
+            break
+    return "\n".join(parts)
+
+
+def _fetch_page_text(url: str) -> str:
+    """Fetch a webpage and return its readable text, or an error message."""
+    try:
+        # Validate the URL
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+            
+        # Try to validate the URL format
+        parsed_url = urlparse(url)
+        if not parsed_url.netloc:
+            return f"Invalid URL format: {url}"
+        
+        # Revalidate a previously fetched copy instead of downloading it again
+        cached = _page_cache_get(url)
+        headers = {}
+        if cached is not None:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        # Fetch the webpage content, reading at most _MAX_PAGE_BYTES of the body
+        response = _SESSION.get(url, timeout=10, stream=True, headers=headers)
+        try:
+            if cached is not None and response.status_code == 304:
+                return cached['text']
+            response.raise_for_status()  # Raise exception for 4XX/5XX responses
+            html_content = _read_capped_text(response, _MAX_PAGE_BYTES)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        finally:
+            response.close()
+        
+        # Only the leading part of the page can end up in the truncated output
+        html_content = html_content[:_MAX_HTML_CHARS]
+        
+        # Convert HTML to readable text; html2text's pure-Python tokenizer is only used
+        # for small pages, larger ones go through the (C-backed when available) parser
+        if HTML2TEXT_AVAILABLE and len(html_content) < _HTML2TEXT_MAX_SIZE:
+            readable_text = _BoundedHTML2Text().handle(html_content)
+        else:
+            # Fallback to BeautifulSoup
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+            readable_text = _leading_text(soup.stripped_strings, _TEXT_COLLECT_LIMIT)
+        
+        # Truncate if too long; the converters stop early, so the full length is unknown
+        if len(readable_text) > _MAX_TEXT_LENGTH:
+            result = f"{readable_text[:_MAX_TEXT_LENGTH]}\n\n[Content truncated.]"
+        else:
+            result = readable_text
+        
+        # Only pages the server can revalidate are worth keeping
+        if etag or last_modified:
+            _page_cache_put(url, result, etag, last_modified)
+        
+        return result
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching webpage: {str(e)}")
+        return f"Error fetching webpage: {str(e)}"
+    except Exception as e:
+        logger.error(f"Error processing webpage content: {str(e)}")
+        return f"Error processing webpage content: {str(e)}"
+
+# Upper bound on concurrent fetches for get_multiple_webpages
+_MAX_FETCH_WORKERS = 8
+
+# Element polling starts fast and backs off, instead of WebDriverWait's fixed 500ms interval
+_WAIT_INITIAL_INTERVAL = 0.05
+_WAIT_MAX_INTERVAL = 0.25
+_WAIT_BACKOFF = 1.5
+
+
+def _fast_wait(driver, by, selector: str, timeout: float = 10):
+    """Poll for an element until it is present, raising TimeoutException after timeout seconds."""
+    end = time.monotonic() + timeout
+    delay = _WAIT_INITIAL_INTERVAL
+    while True:
+        try:
+            return driver.find_element(by, selector)
+        except NoSuchElementException:
+            pass
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f"Element not present after {timeout}s: {selector}")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * _WAIT_BACKOFF, _WAIT_MAX_INTERVAL)
+
+
 class OpenBrowserTool(BaseTool):
     """Tool for opening the default web browser."""
     
@@ -120,48 +399,45 @@ class GetWebpageContentTool(BaseTool):
     
     def _run(self, url: str, run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
         """Get webpage content as readable text."""
+        return _fetch_page_text(url)
+
+
+class GetMultipleWebpagesTool(BaseTool):
+    """Tool for fetching several webpages concurrently and converting them to readable text."""
+    
+    name: str = "get_multiple_webpages"
+    description: str = """
+    Gets the content of several webpages at once and converts each to readable text.
+    
+    Input should be a JSON list of URLs.
+    Returns a JSON object mapping each URL to its text content or error message.
+    
+    Example: ["https://www.example.com", "https://www.python.org"]
+    """
+    
+    def _run(self, urls_str: str, run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
+        """Fetch several webpages in parallel."""
         try:
-            # Validate the URL
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-                
-            # Try to validate the URL format
-            parsed_url = urlparse(url)
-            if not parsed_url.netloc:
-                return f"Invalid URL format: {url}"
+            try:
+                urls = _json_loads(urls_str)
+            except json.JSONDecodeError:
+                return "Error: Invalid JSON input. Expected a list of URLs"
             
-            # Fetch the webpage content
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()  # Raise exception for 4XX/5XX responses
-            html_content = response.text
+            if not isinstance(urls, list) or not urls or not all(isinstance(url, str) for url in urls):
+                return "Error: Input must be a non-empty JSON list of URLs"
             
-            # Convert HTML to readable text
-            if HTML2TEXT_AVAILABLE:
-                h = html2text.HTML2Text()
-                h.ignore_links = False
-                h.ignore_images = True
-                h.ignore_emphasis = True
-                readable_text = h.handle(html_content)
-            else:
-                # Fallback to BeautifulSoup
-                soup = BeautifulSoup(html_content, 'html.parser')
-                readable_text = soup.get_text(separator='\n', strip=True)
+            # Fetch each distinct URL once, keeping the caller's order
+            urls = list(dict.fromkeys(urls))
             
-            # Truncate if too long
-            max_length = 2000
-            if len(readable_text) > max_length:
-                truncated_text = readable_text[:max_length]
-                remaining_chars = len(readable_text) - max_length
-                return f"{truncated_text}\n\n[Content truncated. {remaining_chars} more characters not shown.]"
-            else:
-                return readable_text
+            # Fetching is I/O bound, so threads overlap the round trips on the shared Session
+            with ThreadPoolExecutor(max_workers=min(_MAX_FETCH_WORKERS, len(urls))) as executor:
+                results = dict(zip(urls, executor.map(_fetch_page_text, urls)))
+            
+            return json.dumps(results, indent=2, ensure_ascii=False)
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching webpage: {str(e)}")
-            return f"Error fetching webpage: {str(e)}"
         except Exception as e:
-            logger.error(f"Error processing webpage content: {str(e)}")
-            return f"Error processing webpage content: {str(e)}"
+            logger.error(f"Error with get_multiple_webpages: {str(e)}")
+            return f"Error with get_multiple_webpages: {str(e)}"
 
 
 class ClickWebpageElementTool(BaseTool):
@@ -188,25 +464,12 @@ class ClickWebpageElementTool(BaseTool):
             return "This tool requires Selenium to be installed. Please install Selenium to use this functionality."
         
         try:
-            import json
             try:
-                element_info = json.loads(element_info_str)
+                element_info = _json_loads(element_info_str)
             except json.JSONDecodeError:
                 # Try to extract info from plain text
-                import re
-                url_match = re.search(r"url['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", element_info_str)
-                selector_match = re.search(r"selector['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", element_info_str)
-                type_match = re.search(r"selector_type['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", element_info_str)
-                
-                if selector_match:
-                    element_info = {
-                        "selector": selector_match.group(1)
-                    }
-                    if url_match:
-                        element_info["url"] = url_match.group(1)
-                    if type_match:
-                        element_info["selector_type"] = type_match.group(1)
-                else:
+                element_info = _tolerant_kv_parse(element_info_str, ("url", "selector", "selector_type"))
+                if "selector" not in element_info:
                     return "Error: Invalid input format. Expected JSON with 'selector' and optional 'url' and 'selector_type'"
             
             if not isinstance(element_info, dict):
@@ -217,56 +480,43 @@ class ClickWebpageElementTool(BaseTool):
             
             url = element_info.get("url", None)
             selector = element_info["selector"]
-            selector_type = element_info.get("selector_type", "css").lower()
+            by_method = _BY_METHODS.get(element_info.get("selector_type", "css").lower())
             
-            if selector_type not in ["css", "xpath"]:
+            if by_method is None:
                 return "Error: selector_type must be 'css' or 'xpath'"
             
-            # Initialize Selenium WebDriver
-            options = Options()
-            options.add_argument("--headless=new")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            
-            driver = webdriver.Chrome(options=options)
-            driver.set_page_load_timeout(30)
-            
-            try:
-                # Navigate to the URL if provided
-                if url:
-                    if not url.startswith(('http://', 'https://')):
-                        url = 'https://' + url
-                    driver.get(url)
-                
-                # Set up the selector method
-                by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
-                
-                # Wait for the element to be present and click it
-                element = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((by_method, selector))
-                )
-                
-                # Scroll the element into view
-                driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                
-                # Click the element
-                element.click()
-                
-                # Get the current URL after the click
-                current_url = driver.current_url
-                
-                return f"Successfully clicked element with selector '{selector}'. Current URL: {current_url}"
-                
-            except TimeoutException:
-                return f"Timed out waiting for element with selector: {selector}"
-            except NoSuchElementException:
-                return f"Element not found with selector: {selector}"
-            except Exception as e:
-                return f"Error during browser interaction: {str(e)}"
-            finally:
-                driver.quit()
-                
+            # Hold the shared Selenium WebDriver for the whole interaction
+            with _browser_session() as driver:
+                try:
+                    # Navigate to the URL if provided
+                    if url:
+                        if not url.startswith(('http://', 'https://')):
+                            url = 'https://' + url
+                        driver.get(url)
+                    
+                    # Wait for the element to be present and click it
+                    element = _fast_wait(driver, by_method, selector)
+                    
+                    # Scroll the element into view and click it
+                    driver.execute_script(_SCROLL_AND_CLICK_JS, element)
+                    
+                    # Get the current URL after the click
+                    current_url = driver.current_url
+                    
+                    return f"Successfully clicked element with selector '{selector}'. Current URL: {current_url}"
+                    
+                except TimeoutException:
+                    return f"Timed out waiting for element with selector: {selector}"
+                except NoSuchElementException:
+                    return f"Element not found with selector: {selector}"
+                except WebDriverException as e:
+                    # Only a lost session is worth a fresh browser; page-level errors keep the page
+                    if is_session_lost(e):
+                        _quit_driver()
+                    return f"Error during browser interaction: {str(e)}"
+                except Exception as e:
+                    return f"Error during browser interaction: {str(e)}"
+                    
         except Exception as e:
             logger.error(f"Error with click_webpage_element: {str(e)}")
             return f"Error with click_webpage_element: {str(e)}"
@@ -297,27 +547,12 @@ class FillWebpageFormTool(BaseTool):
             return "This tool requires Selenium to be installed. Please install Selenium to use this functionality."
         
         try:
-            import json
             try:
-                form_info = json.loads(form_info_str)
+                form_info = _json_loads(form_info_str)
             except json.JSONDecodeError:
                 # Try to extract info from plain text
-                import re
-                url_match = re.search(r"url['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", form_info_str)
-                selector_match = re.search(r"field_selector['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", form_info_str)
-                type_match = re.search(r"selector_type['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", form_info_str)
-                value_match = re.search(r"value['\"]?\s*[:=]\s*['\"]([^'\"]+)['\"]", form_info_str)
-                
-                if selector_match and value_match:
-                    form_info = {
-                        "field_selector": selector_match.group(1),
-                        "value": value_match.group(1)
-                    }
-                    if url_match:
-                        form_info["url"] = url_match.group(1)
-                    if type_match:
-                        form_info["selector_type"] = type_match.group(1)
-                else:
+                form_info = _tolerant_kv_parse(form_info_str, ("url", "field_selector", "selector_type", "value"))
+                if "field_selector" not in form_info or "value" not in form_info:
                     return "Error: Invalid input format. Expected JSON with 'field_selector', 'value', and optional 'url' and 'selector_type'"
             
             if not isinstance(form_info, dict):
@@ -329,54 +564,175 @@ class FillWebpageFormTool(BaseTool):
             url = form_info.get("url", None)
             field_selector = form_info["field_selector"]
             value = form_info["value"]
-            selector_type = form_info.get("selector_type", "css").lower()
+            by_method = _BY_METHODS.get(form_info.get("selector_type", "css").lower())
             
-            if selector_type not in ["css", "xpath"]:
+            if by_method is None:
                 return "Error: selector_type must be 'css' or 'xpath'"
             
-            # Initialize Selenium WebDriver
-            options = Options()
-            options.add_argument("--headless=new")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
+            # Hold the shared Selenium WebDriver for the whole interaction
+            with _browser_session() as driver:
+                try:
+                    # Navigate to the URL if provided
+                    if url:
+                        if not url.startswith(('http://', 'https://')):
+                            url = 'https://' + url
+                        driver.get(url)
+                    
+                    # Wait for the element to be present
+                    field = _fast_wait(driver, by_method, field_selector)
+                    
+                    # Scroll the element into view and replace its value
+                    driver.execute_script(_SET_VALUE_JS, field, value)
+                    
+                    return f"Successfully filled form field '{field_selector}' with value '{value}'"
+                    
+                except TimeoutException:
+                    return f"Timed out waiting for form field with selector: {field_selector}"
+                except NoSuchElementException:
+                    return f"Form field not found with selector: {field_selector}"
+                except WebDriverException as e:
+                    # Only a lost session is worth a fresh browser; page-level errors keep the page
+                    if is_session_lost(e):
+                        _quit_driver()
+                    return f"Error during form filling: {str(e)}"
+                except Exception as e:
+                    return f"Error during form filling: {str(e)}"
+                    
+        except Exception as e:
+            logger.error(f"Error with fill_webpage_form: {str(e)}")
+            return f"Error with fill_webpage_form: {str(e)}"
+
+
+class RunBrowserScriptTool(BaseTool):
+    """Tool for running several click/fill steps against one page in a single browser session."""
+    
+    name: str = "run_browser_script"
+    description: str = """
+    Runs a sequence of clicks and form fills on a webpage in one browser session.
+    Note: This tool requires Selenium to be installed.
+    
+    Input should be a JSON object with:
+    - 'url' (optional): URL of the webpage if not already on the page
+    - 'steps': list of steps, each with:
+        - 'action': 'click' or 'fill'
+        - 'selector': CSS selector or XPath to identify the element
+        - 'selector_type' (optional): 'css' (default) or 'xpath'
+        - 'value': text to enter (required for 'fill')
+    
+    Example: {"url": "https://example.com/login", "steps": [
+        {"action": "fill", "selector": "#username", "value": "user"},
+        {"action": "fill", "selector": "#password", "value": "secret"},
+        {"action": "click", "selector": "button[type=submit]"}
+    ]}
+    
+    Returns one result line per step; stops at the first step that fails.
+    """
+    
+    def _run(self, script_str: str, run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
+        """Run a batch of click/fill steps."""
+        if not SELENIUM_AVAILABLE:
+            return "This tool requires Selenium to be installed. Please install Selenium to use this functionality."
+        
+        try:
+            try:
+                script = _json_loads(script_str)
+            except json.JSONDecodeError:
+                return "Error: Invalid JSON input. Expected an object with 'steps' and optional 'url'"
             
-            driver = webdriver.Chrome(options=options)
-            driver.set_page_load_timeout(30)
+            if not isinstance(script, dict):
+                return "Error: Input must be a dictionary/JSON object"
             
-            try:
-                # Navigate to the URL if provided
-                if url:
-                    if not url.startswith(('http://', 'https://')):
-                        url = 'https://' + url
-                    driver.get(url)
-                
-                # Set up the selector method
-                by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
-                
-                # Wait for the element to be present
-                field = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((by_method, field_selector))
-                )
-                
-                # Scroll the element into view
-                driver.execute_script("arguments[0].scrollIntoView(true);", field)
-                
-                # Clear the field and fill it with the value
-                field.clear()
-                field.send_keys(value)
-                
-                return f"Successfully filled form field '{field_selector}' with value '{value}'"
-                
-            except TimeoutException:
-                return f"Timed out waiting for form field with selector: {field_selector}"
-            except NoSuchElementException:
-                return f"Form field not found with selector: {field_selector}"
-            except Exception as e:
-                return f"Error during form filling: {str(e)}"
-            finally:
-                driver.quit()
+            steps = script.get("steps")
+            if not isinstance(steps, list) or not steps:
+                return "Error: Input must contain a non-empty 'steps' list"
+            
+            # Hold the shared Selenium WebDriver for the whole interaction
+            with _browser_session() as driver:
+                results = []
                 
+                try:
+                    url = script.get("url")
+                    if url:
+                        if not url.startswith(('http://', 'https://')):
+                            url = 'https://' + url
+                        driver.get(url)
+                    
+                    for index, step in enumerate(steps, 1):
+                        if not isinstance(step, dict) or "selector" not in step:
+                            results.append(f"Step {index}: Error: each step must be an object with 'selector'")
+                            break
+                        
+                        action = str(step.get("action", "")).lower()
+                        selector = step["selector"]
+                        by_method = _BY_METHODS.get(step.get("selector_type", "css").lower())
+                        
+                        if by_method is None:
+                            results.append(f"Step {index}: Error: selector_type must be 'css' or 'xpath'")
+                            break
+                        handler = self._ACTIONS.get(action)
+                        if handler is None:
+                            results.append(f"Step {index}: Error: action must be 'click' or 'fill'")
+                            break
+                        if action == "fill" and "value" not in step:
+                            results.append(f"Step {index}: Error: 'fill' requires 'value'")
+                            break
+                        
+                        try:
+                            element = _fast_wait(driver, by_method, selector)
+                        except TimeoutException:
+                            results.append(f"Step {index}: Timed out waiting for element with selector: {selector}")
+                            break
+                        
+                        results.append(f"Step {index}: {handler(self, driver, element, step)}")
+                    
+                    results.append(f"Current URL: {driver.current_url}")
+                    return "\n".join(results)
+                    
+                except WebDriverException as e:
+                    # Only a lost session is worth a fresh browser; page-level errors keep the page
+                    if is_session_lost(e):
+                        _quit_driver()
+                    results.append(f"Error during browser interaction: {str(e)}")
+                    return "\n".join(results)
+                    
         except Exception as e:
-            logger.error(f"Error with fill_webpage_form: {str(e)}")
-            return f"Error with fill_webpage_form: {str(e)}"
\ No newline at end of file
+            logger.error(f"Error with run_browser_script: {str(e)}")
+            return f"Error with run_browser_script: {str(e)}"
+    
+    def _click_step(self, driver, element, step: Dict[str, Any]) -> str:
+        driver.execute_script(_SCROLL_AND_CLICK_JS, element)
+        return f"Clicked '{step['selector']}'"
+    
+    def _fill_step(self, driver, element, step: Dict[str, Any]) -> str:
+        driver.execute_script(_SET_VALUE_JS, element, str(step["value"]))
+        return f"Filled '{step['selector']}'"
+    
+    # Step action -> handler, resolved with a single dict lookup per step
+    _ACTIONS: ClassVar[Dict[str, Callable[..., str]]] = {
+        "click": _click_step,
+        "fill": _fill_step,
+    }
+
+
+class CloseBrowserTool(BaseTool):
+    """Tool for shutting down the headless browser used by the webpage tools."""
+    
+    name: str = "close_browser"
+    description: str = """
+    Closes the headless browser session used by click_webpage_element, fill_webpage_form
+    and run_browser_script.
+    A new session is started automatically the next time one of those tools is used.
+    
+    No input is required.
+    Returns a confirmation message or error.
+    """
+    
+    def _run(self, _: str = "", run_manager: Optional[CallbackManagerForToolRun] = None, *args, **kwargs) -> str:
+        """Close the shared headless browser."""
+        try:
+            if _quit_driver():
+                return "Browser session closed."
+            return "No browser session is running."
+        except Exception as e:
+            logger.error(f"Error closing browser: {str(e)}")
+            return f"Error closing browser: {str(e)}"
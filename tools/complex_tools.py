@@ -5,16 +5,22 @@ Includes website navigation, content extraction, and file upload capabilities.
 
 import sys
 
+import io
 import os
 import json
 import logging
 import time
 import re
-import base64
-import mimetypes
-from typing import List, Dict, Any, Optional, Union, Tuple
+import hashlib
+import stat
+import tempfile
+import threading
+import contextlib
+import collections
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable, ClassVar
 from langchain.callbacks.manager import CallbackManagerForToolRun
 from langchain.tools.base import BaseTool
+from tools.base_tools import is_session_lost, HTML_PARSER
 
 def resource_path(relative_path):
     """
@@ -33,13 +39,98 @@ logger = logging.getLogger(__name__)
 
 try:
     import requests
-    from bs4 import BeautifulSoup
-    import html2text
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from bs4 import BeautifulSoup, SoupStrainer
+    # Only the tags extract_website_structure looks at (with their subtrees) are parsed
+    _STRUCTURE_STRAINER = SoupStrainer(
+        ['title', 'meta', 'nav', 'div', 'section', 'article', 'footer', 'img', 'form', 'button', 'a']
+    )
     WEB_TOOLS_AVAILABLE = True
 except ImportError:
     logger.warning("Web tools dependencies not available. Web operations will be limited.")
     WEB_TOOLS_AVAILABLE = False
 
+# html2text is only needed for markdown output, so it is imported on first use
+_HTML2TEXT = None
+_HTML2TEXT_CHECKED = False
+
+
+def _get_html2text():
+    """Return the html2text module, or None if it is not installed."""
+    global _HTML2TEXT, _HTML2TEXT_CHECKED
+    if not _HTML2TEXT_CHECKED:
+        try:
+            import html2text
+            _HTML2TEXT = html2text
+        except ImportError:
+            logger.warning("html2text not available. Markdown conversion will be limited.")
+        _HTML2TEXT_CHECKED = True
+    return _HTML2TEXT
+
+
+# HTTP session for extract_website_structure; with requests_cache installed, responses are
+# kept in an on-disk cache for an hour (honouring Cache-Control) so repeat visits skip the network
+if WEB_TOOLS_AVAILABLE:
+    try:
+        import requests_cache
+        _SESSION = requests_cache.CachedSession(
+            os.path.join(tempfile.gettempdir(), "autopilot_web"),
+            backend="sqlite",
+            expire_after=3600,
+            cache_control=True,
+        )
+    except ImportError:
+        _SESSION = requests.Session()
+    
+    # Pooled keep-alive connections, retrying transient gateway errors a couple of times
+    _HTTP_ADAPTER = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+    )
+    _SESSION.mount("https://", _HTTP_ADAPTER)
+    _SESSION.mount("http://", _HTTP_ADAPTER)
+    _SESSION.headers["User-Agent"] = "AutoPilot/1.0"
+
+# extract_website_structure reads at most this much of a page; the raw bytes go to
+# BeautifulSoup, decoded with the charset from the Content-Type header if the server sent
+# one, otherwise with the one BeautifulSoup detects from the markup
+_MAX_STRUCTURE_BYTES = 2 * 1024 * 1024
+_STRUCTURE_CHUNK_SIZE = 16 * 1024
+
+# Class-name patterns (matched anywhere in an element's classes) and the tags they apply to
+# when extract_website_structure classifies navigation, section and footer elements
+_NAV_CLASS_RE = re.compile(r"nav|menu|navigation|header", re.IGNORECASE)
+_SECTION_CLASS_RE = re.compile(r"section|container|content|wrapper|block", re.IGNORECASE)
+_FOOTER_CLASS_RE = re.compile(r"footer", re.IGNORECASE)
+_NAV_TAGS = frozenset(('nav', 'div'))
+_SECTION_TAGS = frozenset(('section', 'div', 'article'))
+_FOOTER_TAGS = frozenset(('footer', 'div'))
+_CLASSIFIED_TAGS = _NAV_TAGS | _SECTION_TAGS | _FOOTER_TAGS
+
+# Finished structure reports keyed by (url, ETag or Last-Modified) and by (url, digest of the
+# page bytes), most recently used last
+_STRUCTURE_CACHE = collections.OrderedDict()
+_STRUCTURE_CACHE_MAX_ENTRIES = 128
+_STRUCTURE_CACHE_LOCK = threading.Lock()
+
+
+def _structure_cache_get(key):
+    with _STRUCTURE_CACHE_LOCK:
+        report = _STRUCTURE_CACHE.get(key)
+        if report is not None:
+            _STRUCTURE_CACHE.move_to_end(key)
+        return report
+
+
+def _structure_cache_put(key, report: str) -> None:
+    with _STRUCTURE_CACHE_LOCK:
+        _STRUCTURE_CACHE[key] = report
+        _STRUCTURE_CACHE.move_to_end(key)
+        if len(_STRUCTURE_CACHE) > _STRUCTURE_CACHE_MAX_ENTRIES:
+            _STRUCTURE_CACHE.popitem(last=False)
+
 try:
     from selenium import webdriver
     from selenium.webdriver.common.by import By
@@ -51,29 +142,140 @@ try:
         TimeoutException, NoSuchElementException, WebDriverException,
         ElementClickInterceptedException, StaleElementReferenceException
     )
+    # Locator strategy per selector_type; anything other than 'css' is treated as XPath
+    _BY_MAP = {"css": By.CSS_SELECTOR, "xpath": By.XPATH}
     SELENIUM_AVAILABLE = True
 except ImportError:
     logger.warning("Selenium not available. Advanced web interactions will be limited.")
     SELENIUM_AVAILABLE = False
 
+# Longest an interaction may take to start a page load before we stop waiting for one;
+# these match the fixed pauses they replace, so pages that never navigate cost no more
+_CLICK_SETTLE_TIMEOUT = 1
+_SUBMIT_SETTLE_TIMEOUT = 2
+# Longest to wait for the document to finish parsing (readyState past "loading")
+_PAGE_READY_TIMEOUT = 10
+
+
+def _document_ready(driver) -> bool:
+    return driver.execute_script("return document.readyState") != "loading"
+
+
+def _wait_ready(driver, prev_element=None, settle_timeout: float = 0) -> None:
+    """Wait until the current page's DOM is ready.
+    
+    If prev_element is given, first wait up to settle_timeout seconds for it to go stale,
+    i.e. for a navigation triggered by the last interaction to replace the page.
+    """
+    try:
+        if prev_element is not None:
+            try:
+                WebDriverWait(driver, settle_timeout).until(EC.staleness_of(prev_element))
+            except TimeoutException:
+                pass  # The interaction did not navigate
+        WebDriverWait(driver, _PAGE_READY_TIMEOUT).until(_document_ready)
+    except TimeoutException:
+        logger.warning("Timed out waiting for the page's DOM to be ready")
+
+
+# For each [selector, is_xpath] query, the trimmed visible text of every matching node;
+# one round trip instead of a find_elements call plus one .text call per element.
+# An invalid selector yields {error: message} for its own slot instead of failing the batch
+_EXTRACT_TEXTS_JS = """
+return arguments[0].map(function (query) {
+    var nodes = [];
+    try {
+        if (query[1]) {
+            var found = document.evaluate(query[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < found.snapshotLength; i++) {
+                nodes.push(found.snapshotItem(i));
+            }
+        } else {
+            nodes = Array.from(document.querySelectorAll(query[0]));
+        }
+    } catch (e) {
+        return {error: String(e && e.message ? e.message : e)};
+    }
+    return nodes.map(function (node) {
+        return (node.innerText !== undefined ? node.innerText : node.textContent).trim();
+    });
+});
+"""
+
+def _format_file_size(size: int) -> str:
+    """Format a byte count as KB below 1 MB, otherwise as MB."""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.2f} KB"
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def _pool_size_from_env() -> int:
+    try:
+        return max(1, int(os.environ.get("AUTOPILOT_DRIVER_POOL", "4")))
+    except ValueError:
+        return 4
+
+
+def _wait_timeout_from_env() -> float:
+    try:
+        return max(0.0, float(os.environ.get("AUTOPILOT_WAIT_S", "10")))
+    except ValueError:
+        return 10.0
+
+
+# Most headless browsers WebDriverManager runs at once (env AUTOPILOT_DRIVER_POOL),
+# and how long a tool call waits for one to come free
+_DRIVER_POOL_SIZE = _pool_size_from_env()
+_DRIVER_ACQUIRE_TIMEOUT = 60
+
+# Element wait used by the complex tools: timeout in seconds (env AUTOPILOT_WAIT_S) and how
+# often the condition is re-checked
+_ELEMENT_WAIT_TIMEOUT = _wait_timeout_from_env()
+_ELEMENT_WAIT_POLL_INTERVAL = 0.2
+
+# Chrome content settings for pooled drivers (2 = block). Set AUTOPILOT_DRIVER_LEAN=1 to also
+# block stylesheets and fonts; leave it off when selectors depend on layout or visibility
+_DRIVER_CONTENT_PREFS = {"profile.managed_default_content_settings.images": 2}
+if os.environ.get("AUTOPILOT_DRIVER_LEAN") == "1":
+    _DRIVER_CONTENT_PREFS.update({
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+    })
+
 
 class WebDriverManager:
-    """A singleton class to manage the web driver instance."""
+    """A singleton managing a bounded pool of headless Chrome WebDrivers.
+    
+    Drivers are started on demand, up to _DRIVER_POOL_SIZE, and handed out most recently
+    returned first, so sequential tool calls keep reusing the same browser session (and its
+    cookies) while concurrent calls each get a browser of their own.
+    """
     
     _instance = None
-    _driver = None
+    _instance_lock = threading.Lock()
     
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(WebDriverManager, cls).__new__(cls)
-            cls._instance._initialize_driver()
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(WebDriverManager, cls).__new__(cls)
+                instance._initialize_pool()
+                cls._instance = instance
         return cls._instance
     
-    def _initialize_driver(self):
-        """Initialize the web driver if Selenium is available."""
+    def _initialize_pool(self):
+        """Set up the empty driver pool."""
+        # Idle drivers, most recently returned last; _available is notified whenever a driver
+        # is returned or a slot is freed, so waiting callers can take either
+        self._idle = []
+        self._created = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+    
+    def _create_driver(self):
+        """Start a new WebDriver if Selenium is available, returning None on failure."""
         if not SELENIUM_AVAILABLE:
             logger.warning("Selenium not available. Advanced web interactions will be limited.")
-            return
+            return None
         
         try:
             options = Options()
@@ -81,29 +283,119 @@ class WebDriverManager:
             options.add_argument("--disable-gpu")
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
-            
-            self._driver = webdriver.Chrome(options=options)
-            self._driver.set_page_load_timeout(30)
+            options.add_argument("--disable-extensions")
+            options.add_argument("--disable-background-networking")
+            
+            # The tools only read and drive the DOM, so skip downloading images (and, in lean
+            # mode, stylesheets and fonts)
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option("prefs", _DRIVER_CONTENT_PREFS)
+            
+            # Return from driver.get() at DOMContentLoaded rather than after every subresource;
+            # content that arrives later is picked up by the tools' explicit element waits
+            options.page_load_strategy = "eager"
+            
+            driver = webdriver.Chrome(options=options)
+            driver.set_page_load_timeout(15)
+            # One element wait per driver, shared by every tool call that checks it out
+            driver._autopilot_wait = WebDriverWait(
+                driver, _ELEMENT_WAIT_TIMEOUT, poll_frequency=_ELEMENT_WAIT_POLL_INTERVAL
+            )
             logger.info("WebDriver initialized successfully")
+            return driver
         except Exception as e:
             logger.error(f"Failed to initialize WebDriver: {str(e)}")
-            self._driver = None
+            return None
+    
+    def _checkout(self, timeout: float):
+        """Take an idle driver, start a new one if below the limit, or wait for either."""
+        deadline = time.monotonic() + timeout
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < _DRIVER_POOL_SIZE:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error("Timed out waiting for a free WebDriver")
+                    return None
+                self._available.wait(remaining)
+        
+        driver = self._create_driver()
+        if driver is None:
+            self._free_slot()
+        return driver
+    
+    def _free_slot(self):
+        """Give up one driver slot and wake a caller waiting for one."""
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+    
+    @contextlib.contextmanager
+    def acquire(self, timeout: float = _DRIVER_ACQUIRE_TIMEOUT):
+        """Check out a WebDriver for the duration of a with block; yields None on failure."""
+        driver = self._checkout(timeout)
+        try:
+            yield driver
+        except WebDriverException as e:
+            if driver is not None and is_session_lost(e):
+                self._discard(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                self.release(driver)
+    
+    def release(self, driver):
+        """Return a checked-out WebDriver to the pool, or discard it if its browser has died."""
+        # The tools report most errors themselves, so probe the session rather than relying
+        # on an exception reaching acquire(); this is one cheap local round trip
+        try:
+            driver.current_window_handle
+        except Exception as e:
+            logger.warning(f"Discarding WebDriver with a dead session: {str(e)}")
+            self._discard(driver)
+            return
+        with self._available:
+            self._idle.append(driver)
+            self._available.notify()
+    
+    def _discard(self, driver):
+        """Quit a checked-out WebDriver and free its slot in the pool."""
+        self._free_slot()
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing WebDriver: {str(e)}")
     
-    def get_driver(self):
-        """Get the WebDriver instance, re-initializing if necessary."""
-        if self._driver is None:
-            self._initialize_driver()
-        return self._driver
+    def prewarm(self):
+        """Start one idle WebDriver ahead of time, unless the pool already has one."""
+        with self._lock:
+            if self._created:
+                return
+            self._created += 1
+        
+        driver = self._create_driver()
+        if driver is None:
+            self._free_slot()
+        else:
+            self.release(driver)
     
     def close(self):
-        """Close the WebDriver instance."""
-        if self._driver is not None:
-            try:
-                self._driver.quit()
-            except Exception as e:
-                logger.error(f"Error closing WebDriver: {str(e)}")
-            finally:
-                self._driver = None
+        """Close all idle WebDriver instances."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+
+# With AUTOPILOT_PREWARM_DRIVER=1, Chrome starts in the background at import so the first
+# browser tool call doesn't wait for it
+if SELENIUM_AVAILABLE and os.environ.get("AUTOPILOT_PREWARM_DRIVER") == "1":
+    threading.Thread(target=WebDriverManager().prewarm, name="webdriver-prewarm", daemon=True).start()
 
 
 class NavigateComplexWebsiteTool(BaseTool):
@@ -142,7 +434,6 @@ class NavigateComplexWebsiteTool(BaseTool):
         
         try:
             # Parse the input
-            import json
             try:
                 navigation_info = json.loads(navigation_info_str)
             except json.JSONDecodeError:
@@ -160,240 +451,243 @@ class NavigateComplexWebsiteTool(BaseTool):
             if not isinstance(actions, list):
                 return "Error: 'actions' must be an array"
             
-            # Get WebDriver instance
-            driver_manager = WebDriverManager()
-            driver = driver_manager.get_driver()
-            
-            if driver is None:
-                return "Error: Failed to initialize WebDriver"
-            
-            # Navigate to the URL
-            try:
-                if not url.startswith(('http://', 'https://')):
-                    url = 'https://' + url
+            # Check a WebDriver out of the pool for the duration of this call
+            with WebDriverManager().acquire() as driver:
+                if driver is None:
+                    return "Error: Failed to initialize WebDriver"
                 
-                driver.get(url)
-                logger.info(f"Navigated to URL: {url}")
-                time.sleep(2)  # Brief pause to ensure page loads
-            except Exception as e:
-                return f"Error: Failed to navigate to URL: {str(e)}"
-            
-            # Perform each action in sequence
-            results = []
-            
-            for i, action in enumerate(actions, 1):
+                # Navigate to the URL
                 try:
-                    if not isinstance(action, dict):
-                        results.append(f"Error on action {i}: Action must be an object")
-                        continue
-                    
-                    action_type = action.get("type")
-                    if not action_type:
-                        results.append(f"Error on action {i}: Missing 'type'")
-                        continue
-                    
-                    # Handle different action types
-                    if action_type == "click":
-                        selector = action.get("selector")
-                        selector_type = action.get("selector_type", "css").lower()
-                        
-                        if not selector:
-                            results.append(f"Error on action {i}: 'click' action requires 'selector'")
-                            continue
-                        
-                        by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
-                        
-                        try:
-                            element = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((by_method, selector))
-                            )
-                            driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                            time.sleep(0.5)
-                            
-                            try:
-                                element.click()
-                                results.append(f"Clicked element: {selector}")
-                            except ElementClickInterceptedException:
-                                # Try JavaScript click if normal click is intercepted
-                                driver.execute_script("arguments[0].click();", element)
-                                results.append(f"Clicked element (via JavaScript): {selector}")
-                                
-                            time.sleep(1)  # Brief pause after click
-                            
-                        except TimeoutException:
-                            results.append(f"Timeout waiting for element: {selector}")
-                            continue
-                        except NoSuchElementException:
-                            results.append(f"Element not found: {selector}")
-                            continue
-                        except Exception as e:
-                            results.append(f"Error clicking element: {str(e)}")
-                            continue
+                    if not url.startswith(('http://', 'https://')):
+                        url = 'https://' + url
                     
-                    elif action_type == "fill":
-                        selector = action.get("selector")
-                        selector_type = action.get("selector_type", "css").lower()
-                        value = action.get("value")
-                        
-                        if not selector:
-                            results.append(f"Error on action {i}: 'fill' action requires 'selector'")
-                            continue
-                        
-                        if value is None:
-                            results.append(f"Error on action {i}: 'fill' action requires 'value'")
-                            continue
-                        
-                        by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
-                        
-                        try:
-                            element = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((by_method, selector))
-                            )
-                            driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                            time.sleep(0.5)
-                            
-                            element.clear()
-                            element.send_keys(str(value))
-                            results.append(f"Filled form field '{selector}' with value '{value}'")
-                            time.sleep(0.5)  # Brief pause after filling
-                            
-                        except TimeoutException:
-                            results.append(f"Timeout waiting for element: {selector}")
-                            continue
-                        except NoSuchElementException:
-                            results.append(f"Element not found: {selector}")
-                            continue
-                        except Exception as e:
-                            results.append(f"Error filling element: {str(e)}")
+                    driver.get(url)
+                    logger.info(f"Navigated to URL: {url}")
+                    _wait_ready(driver)
+                except Exception as e:
+                    return f"Error: Failed to navigate to URL: {str(e)}"
+                
+                # Perform each action in sequence. Extracts don't change the page, so they are
+                # held back until the next action that might and then run in one script
+                results = []
+                pending_extracts = []
+                
+                for i, action in enumerate(actions, 1):
+                    try:
+                        if not isinstance(action, dict):
+                            results.append(f"Error on action {i}: Action must be an object")
                             continue
-                    
-                    elif action_type == "wait":
-                        wait_time = action.get("wait_time", 1)
                         
-                        try:
-                            wait_time = float(wait_time)
-                            if wait_time < 0 or wait_time > 30:
-                                wait_time = min(max(wait_time, 0), 30)  # Clamp between 0 and 30
-                                
-                            time.sleep(wait_time)
-                            results.append(f"Waited for {wait_time} seconds")
-                            
-                        except ValueError:
-                            results.append(f"Error on action {i}: 'wait_time' must be a number")
-                            continue
-                        except Exception as e:
-                            results.append(f"Error during wait: {str(e)}")
+                        action_type = action.get("type")
+                        if not action_type:
+                            results.append(f"Error on action {i}: Missing 'type'")
                             continue
-                    
-                    elif action_type == "extract":
-                        selector = action.get("selector")
-                        selector_type = action.get("selector_type", "css").lower()
                         
-                        if not selector:
-                            results.append(f"Error on action {i}: 'extract' action requires 'selector'")
+                        if action_type == "extract" and action.get("selector"):
+                            pending_extracts.append((len(results), action))
+                            results.append(None)
                             continue
                         
-                        by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
-                        
-                        try:
-                            elements = driver.find_elements(by_method, selector)
-                            
-                            if not elements:
-                                results.append(f"No elements found for selector: {selector}")
-                                continue
-                            
-                            extracted_texts = []
-                            for elem in elements:
-                                extracted_texts.append(elem.text.strip())
-                            
-                            combined_text = "\n".join(extracted_texts)
-                            if len(combined_text) > 500:
-                                combined_text = combined_text[:497] + "..."
-                                
-                            results.append(f"Extracted from '{selector}':\n{combined_text}")
-                            
-                        except Exception as e:
-                            results.append(f"Error extracting content: {str(e)}")
-                            continue
-                    
-                    elif action_type == "submit":
-                        selector = action.get("selector")
-                        selector_type = action.get("selector_type", "css").lower()
+                        if action_type != "extract":
+                            self._flush_extracts(driver, pending_extracts, results)
                         
-                        if not selector:
-                            # Try to find a form and submit it
-                            try:
-                                forms = driver.find_elements(By.TAG_NAME, "form")
-                                if forms:
-                                    forms[0].submit()
-                                    results.append("Submitted form")
-                                    time.sleep(2)  # Wait for form submission
-                                else:
-                                    results.append("No form found to submit")
-                            except Exception as e:
-                                results.append(f"Error submitting form: {str(e)}")
+                        handler = self._ACTIONS.get(action_type)
+                        if handler is None:
+                            results.append(f"Error on action {i}: Unknown action type '{action_type}'")
                             continue
                         
-                        by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
+                        results.append(handler(self, driver, action, i))
                         
-                        try:
-                            element = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((by_method, selector))
-                            )
-                            
-                            # Check if it's a form
-                            if element.tag_name.lower() == "form":
-                                element.submit()
-                                results.append(f"Submitted form: {selector}")
-                            else:
-                                # Try to find the parent form and submit it
-                                try:
-                                    parent_form = element.find_element(By.XPATH, "./ancestor::form")
-                                    parent_form.submit()
-                                    results.append(f"Submitted parent form of: {selector}")
-                                except:
-                                    # Otherwise just click the element (might be a submit button)
-                                    element.click()
-                                    results.append(f"Clicked submit element: {selector}")
-                                    
-                            time.sleep(2)  # Wait for form submission
-                            
-                        except TimeoutException:
-                            results.append(f"Timeout waiting for element: {selector}")
-                            continue
-                        except NoSuchElementException:
-                            results.append(f"Element not found: {selector}")
-                            continue
-                        except Exception as e:
-                            results.append(f"Error submitting form: {str(e)}")
-                            continue
-                    
-                    else:
-                        results.append(f"Error on action {i}: Unknown action type '{action_type}'")
-                        
-                except Exception as e:
-                    results.append(f"Error on action {i}: {str(e)}")
-            
-            # Capture final page state
-            current_url = driver.current_url
-            page_title = driver.title
-            
-            # Format the results
-            output = [
-                f"Complex website navigation completed.",
-                f"Final URL: {current_url}",
-                f"Page Title: {page_title}",
-                "\nAction Results:"
-            ]
+                    except Exception as e:
+                        results.append(f"Error on action {i}: {str(e)}")
+                
+                self._flush_extracts(driver, pending_extracts, results)
+                
+                # Capture final page state
+                current_url = driver.current_url
+                page_title = driver.title
+                
+                # Format the results straight into one buffer
+                output = io.StringIO()
+                output.write("Complex website navigation completed.\n")
+                output.write(f"Final URL: {current_url}\n")
+                output.write(f"Page Title: {page_title}\n")
+                output.write("\nAction Results:")
+                
+                for i, result in enumerate(results, 1):
+                    output.write(f"\n{i}. {result}")
+                
+                return output.getvalue()
+                
+        except Exception as e:
+            logger.error(f"Error in complex website navigation: {str(e)}")
+            return f"Error in complex website navigation: {str(e)}"
+    
+    def _action_locator(self, action: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """Return the action's selector and the matching By strategy."""
+        return action.get("selector"), _BY_MAP.get(action.get("selector_type", "css").lower(), By.XPATH)
+    
+    def _click(self, driver, action: Dict[str, Any], i: int) -> str:
+        selector, by_method = self._action_locator(action)
+        if not selector:
+            return f"Error on action {i}: 'click' action requires 'selector'"
+        
+        try:
+            element = driver._autopilot_wait.until(
+                EC.presence_of_element_located((by_method, selector))
+            )
+            driver.execute_script("arguments[0].scrollIntoView(true);", element)
             
-            for i, result in enumerate(results, 1):
-                output.append(f"{i}. {result}")
+            try:
+                element.click()
+                result = f"Clicked element: {selector}"
+            except ElementClickInterceptedException:
+                # Try JavaScript click if normal click is intercepted
+                driver.execute_script("arguments[0].click();", element)
+                result = f"Clicked element (via JavaScript): {selector}"
+            
+            _wait_ready(driver, element, _CLICK_SETTLE_TIMEOUT)
+            return result
+            
+        except TimeoutException:
+            return f"Timeout waiting for element: {selector}"
+        except NoSuchElementException:
+            return f"Element not found: {selector}"
+        except Exception as e:
+            return f"Error clicking element: {str(e)}"
+    
+    def _fill(self, driver, action: Dict[str, Any], i: int) -> str:
+        selector, by_method = self._action_locator(action)
+        value = action.get("value")
+        if not selector:
+            return f"Error on action {i}: 'fill' action requires 'selector'"
+        if value is None:
+            return f"Error on action {i}: 'fill' action requires 'value'"
+        
+        try:
+            element = driver._autopilot_wait.until(
+                EC.presence_of_element_located((by_method, selector))
+            )
+            driver.execute_script("arguments[0].scrollIntoView(true);", element)
+            
+            element.clear()
+            element.send_keys(str(value))
+            return f"Filled form field '{selector}' with value '{value}'"
+            
+        except TimeoutException:
+            return f"Timeout waiting for element: {selector}"
+        except NoSuchElementException:
+            return f"Element not found: {selector}"
+        except Exception as e:
+            return f"Error filling element: {str(e)}"
+    
+    def _wait(self, driver, action: Dict[str, Any], i: int) -> str:
+        try:
+            wait_time = float(action.get("wait_time", 1))
+            wait_time = min(max(wait_time, 0), 30)  # Clamp between 0 and 30
             
-            return "\n".join(output)
+            time.sleep(wait_time)
+            return f"Waited for {wait_time} seconds"
             
+        except ValueError:
+            return f"Error on action {i}: 'wait_time' must be a number"
         except Exception as e:
-            logger.error(f"Error in complex website navigation: {str(e)}")
-            return f"Error in complex website navigation: {str(e)}"
+            return f"Error during wait: {str(e)}"
+    
+    def _extract(self, driver, action: Dict[str, Any], i: int) -> str:
+        if not action.get("selector"):
+            return f"Error on action {i}: 'extract' action requires 'selector'"
+        
+        results = [None]
+        self._flush_extracts(driver, [(0, action)], results)
+        return results[0]
+    
+    def _flush_extracts(self, driver, pending: List[Tuple[int, Dict[str, Any]]], results: List[Optional[str]]) -> None:
+        """Run pending extract actions in a single script, filling in their slots in results."""
+        if not pending:
+            return
+        
+        try:
+            queries = [
+                [action["selector"], action.get("selector_type", "css").lower() != "css"]
+                for _, action in pending
+            ]
+            texts_per_query = driver.execute_script(_EXTRACT_TEXTS_JS, queries)
+            
+            for (slot, action), texts in zip(pending, texts_per_query):
+                selector = action["selector"]
+                if isinstance(texts, dict):
+                    results[slot] = f"Error extracting content from '{selector}': {texts.get('error')}"
+                    continue
+                if not texts:
+                    results[slot] = f"No elements found for selector: {selector}"
+                    continue
+                
+                combined_text = "\n".join(texts)
+                if len(combined_text) > 500:
+                    combined_text = combined_text[:497] + "..."
+                
+                results[slot] = f"Extracted from '{selector}':\n{combined_text}"
+                
+        except Exception as e:
+            for slot, _ in pending:
+                results[slot] = f"Error extracting content: {str(e)}"
+        finally:
+            pending.clear()
+    
+    def _submit(self, driver, action: Dict[str, Any], i: int) -> str:
+        selector, by_method = self._action_locator(action)
+        
+        if not selector:
+            # Try to find a form and submit it
+            try:
+                forms = driver.find_elements(By.TAG_NAME, "form")
+                if not forms:
+                    return "No form found to submit"
+                forms[0].submit()
+                _wait_ready(driver, forms[0], _SUBMIT_SETTLE_TIMEOUT)
+                return "Submitted form"
+            except Exception as e:
+                return f"Error submitting form: {str(e)}"
+        
+        try:
+            element = driver._autopilot_wait.until(
+                EC.presence_of_element_located((by_method, selector))
+            )
+            
+            # Check if it's a form
+            if element.tag_name.lower() == "form":
+                element.submit()
+                result = f"Submitted form: {selector}"
+            else:
+                # Try to find the parent form and submit it
+                try:
+                    parent_form = element.find_element(By.XPATH, "./ancestor::form")
+                    parent_form.submit()
+                    result = f"Submitted parent form of: {selector}"
+                except:
+                    # Otherwise just click the element (might be a submit button)
+                    element.click()
+                    result = f"Clicked submit element: {selector}"
+            
+            _wait_ready(driver, element, _SUBMIT_SETTLE_TIMEOUT)
+            return result
+            
+        except TimeoutException:
+            return f"Timeout waiting for element: {selector}"
+        except NoSuchElementException:
+            return f"Element not found: {selector}"
+        except Exception as e:
+            return f"Error submitting form: {str(e)}"
+    
+    # Action type -> handler, resolved with a single dict lookup per action
+    _ACTIONS: ClassVar[Dict[str, Callable[..., str]]] = {
+        "click": _click,
+        "fill": _fill,
+        "wait": _wait,
+        "extract": _extract,
+        "submit": _submit,
+    }
 
 
 class UploadFileToWebsiteTool(BaseTool):
@@ -427,7 +721,6 @@ class UploadFileToWebsiteTool(BaseTool):
         
         try:
             # Parse the input
-            import json
             try:
                 upload_info = json.loads(upload_info_str)
             except json.JSONDecodeError:
@@ -444,104 +737,250 @@ class UploadFileToWebsiteTool(BaseTool):
             url = upload_info["url"]
             file_path = upload_info["file_path"]
             upload_selector = upload_info["upload_selector"]
-            selector_type = upload_info.get("selector_type", "css").lower()
+            by_method = _BY_MAP.get(upload_info.get("selector_type", "css").lower(), By.XPATH)
             submit_selector = upload_info.get("submit_selector", None)
             
-            # Check if file exists
+            # Check the file exists and is a regular file with a single stat call
             expanded_path = os.path.expanduser(file_path)
-            if not os.path.exists(expanded_path):
+            try:
+                file_stat = os.stat(expanded_path)
+            except OSError:
                 return f"Error: File '{file_path}' does not exist"
             
-            if not os.path.isfile(expanded_path):
+            if not stat.S_ISREG(file_stat.st_mode):
                 return f"Error: '{file_path}' is not a file"
             
-            # Get WebDriver instance
-            driver_manager = WebDriverManager()
-            driver = driver_manager.get_driver()
-            
-            if driver is None:
-                return "Error: Failed to initialize WebDriver"
+            abs_file_path = os.path.abspath(expanded_path)
             
-            # Navigate to the URL
-            try:
-                if not url.startswith(('http://', 'https://')):
-                    url = 'https://' + url
-                
-                driver.get(url)
-                logger.info(f"Navigated to URL: {url}")
-                time.sleep(2)  # Brief pause to ensure page loads
-            except Exception as e:
-                return f"Error: Failed to navigate to URL: {str(e)}"
-            
-            # Find the file input element
-            by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
-            
-            try:
-                file_input = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((by_method, upload_selector))
-                )
-                
-                # Use absolute path for the file
-                abs_file_path = os.path.abspath(expanded_path)
-                
-                # Send the file path to the input
-                file_input.send_keys(abs_file_path)
-                logger.info(f"File selected: {abs_file_path}")
-                time.sleep(1)  # Brief pause after selecting file
+            # Check a WebDriver out of the pool for the duration of this call
+            with WebDriverManager().acquire() as driver:
+                if driver is None:
+                    return "Error: Failed to initialize WebDriver"
                 
-                # Click submit button if provided
-                if submit_selector:
-                    submit_by_method = By.CSS_SELECTOR if selector_type == "css" else By.XPATH
+                # Navigate to the URL
+                try:
+                    if not url.startswith(('http://', 'https://')):
+                        url = 'https://' + url
                     
-                    try:
-                        submit_button = WebDriverWait(driver, 10).until(
-                            EC.element_to_be_clickable((submit_by_method, submit_selector))
-                        )
-                        
-                        driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-                        time.sleep(0.5)
-                        
-                        submit_button.click()
-                        logger.info("Clicked submit button")
-                        time.sleep(2)  # Wait for upload to complete
-                        
-                    except TimeoutException:
-                        return f"Timeout waiting for submit button: {submit_selector}"
-                    except NoSuchElementException:
-                        return f"Submit button not found: {submit_selector}"
-                    except Exception as e:
-                        return f"Error clicking submit button: {str(e)}"
-                
-                # Get current state of the page
-                current_url = driver.current_url
-                page_title = driver.title
-                
-                # Format the results
-                file_name = os.path.basename(file_path)
-                file_size = os.path.getsize(expanded_path)
-                file_size_formatted = f"{file_size / 1024:.2f} KB" if file_size < 1024 * 1024 else f"{file_size / (1024 * 1024):.2f} MB"
-                
-                output = [
-                    f"File upload completed: {file_name} ({file_size_formatted})",
-                    f"Upload URL: {url}",
-                    f"Current URL: {current_url}",
-                    f"Page Title: {page_title}",
-                ]
+                    driver.get(url)
+                    logger.info(f"Navigated to URL: {url}")
+                    time.sleep(2)  # Brief pause to ensure page loads
+                except Exception as e:
+                    return f"Error: Failed to navigate to URL: {str(e)}"
                 
-                return "\n".join(output)
+                # Find the file input element
+                try:
+                    file_input = driver._autopilot_wait.until(
+                        EC.presence_of_element_located((by_method, upload_selector))
+                    )
+                    
+                    # Send the file path to the input
+                    file_input.send_keys(abs_file_path)
+                    logger.info(f"File selected: {abs_file_path}")
+                    time.sleep(1)  # Brief pause after selecting file
+                    
+                    # Click submit button if provided
+                    if submit_selector:
+                        try:
+                            submit_button = driver._autopilot_wait.until(
+                                EC.element_to_be_clickable((by_method, submit_selector))
+                            )
+                            
+                            driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
+                            time.sleep(0.5)
+                            
+                            submit_button.click()
+                            logger.info("Clicked submit button")
+                            time.sleep(2)  # Wait for upload to complete
+                            
+                        except TimeoutException:
+                            return f"Timeout waiting for submit button: {submit_selector}"
+                        except NoSuchElementException:
+                            return f"Submit button not found: {submit_selector}"
+                        except Exception as e:
+                            return f"Error clicking submit button: {str(e)}"
+                    
+                    # Get current state of the page
+                    current_url = driver.current_url
+                    page_title = driver.title
+                    
+                    # Format the results
+                    file_name = os.path.basename(file_path)
+                    file_size_formatted = _format_file_size(file_stat.st_size)
+                    
+                    output = [
+                        f"File upload completed: {file_name} ({file_size_formatted})",
+                        f"Upload URL: {url}",
+                        f"Current URL: {current_url}",
+                        f"Page Title: {page_title}",
+                    ]
+                    
+                    return "\n".join(output)
+                    
+                except TimeoutException:
+                    return f"Timeout waiting for file input element: {upload_selector}"
+                except NoSuchElementException:
+                    return f"File input element not found: {upload_selector}"
+                except Exception as e:
+                    return f"Error during file upload: {str(e)}"
                 
-            except TimeoutException:
-                return f"Timeout waiting for file input element: {upload_selector}"
-            except NoSuchElementException:
-                return f"File input element not found: {upload_selector}"
-            except Exception as e:
-                return f"Error during file upload: {str(e)}"
-            
         except Exception as e:
             logger.error(f"Error in file upload: {str(e)}")
             return f"Error in file upload: {str(e)}"
 
 
+def _read_structure_html(response) -> bytes:
+    """Read a streamed page body, stopping once _MAX_STRUCTURE_BYTES have arrived."""
+    # "</body>" can't be trusted as an early stop: it also turns up inside inline scripts
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=_STRUCTURE_CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= _MAX_STRUCTURE_BYTES:
+            break
+    return b"".join(chunks)
+
+
+def _declared_encoding(response) -> Optional[str]:
+    """Return the charset declared in the Content-Type header, or None if there is none."""
+    # Without one, requests reports an ISO-8859-1 default for text/* that the markup may contradict
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        return response.encoding
+    return None
+
+
+def _analyze_structure(url: str, html_content: bytes, encoding: Optional[str] = None) -> str:
+    """Build the extract_website_structure report for a fetched page."""
+    # Parse the HTML
+    soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=_STRUCTURE_STRAINER, from_encoding=encoding)
+    
+    # Extract the title and meta description
+    title = soup.title.string.strip() if soup.title else "No title found"
+    
+    meta_description = ""
+    description_tag = soup.find("meta", attrs={"name": "description"})
+    if description_tag and description_tag.get("content"):
+        meta_description = description_tag.get("content").strip()
+    
+    # Classify elements by tag and class in a single pass over the document
+    nav_elements = []
+    potential_sections = []
+    footer = None
+    tag_counts = collections.Counter()
+    
+    for element in soup.descendants:
+        name = element.name
+        if name is None:
+            continue  # Text node
+        tag_counts[name] += 1
+        
+        if name not in _CLASSIFIED_TAGS:
+            continue
+        classes = element.get('class')
+        if not classes:
+            continue
+        class_text = ' '.join(classes)
+        
+        if name in _NAV_TAGS and _NAV_CLASS_RE.search(class_text):
+            nav_elements.append(element)
+        if name in _SECTION_TAGS and _SECTION_CLASS_RE.search(class_text):
+            potential_sections.append(element)
+        if footer is None and name in _FOOTER_TAGS and _FOOTER_CLASS_RE.search(class_text):
+            footer = element
+    
+    # Extract navigation links
+    nav_links = []
+    main_menu_items = []
+    
+    if nav_elements:
+        # Extract links from the first navigation element (usually the main navigation)
+        links = nav_elements[0].find_all('a')
+        for link in links:
+            if link.get('href') and link.text.strip():
+                nav_links.append({
+                    'text': link.text.strip(),
+                    'href': link.get('href')
+                })
+        
+        # Extract main menu items as text only for a cleaner overview
+        main_menu_items = [link['text'] for link in nav_links[:8]]  # Limit to first 8 items
+    
+    # Find major sections of the page
+    major_sections = []
+    for section in potential_sections[:5]:  # Limit to first 5 potential sections
+        # Try to find a heading in this section
+        heading = section.find(['h1', 'h2', 'h3'])
+        if heading and heading.text.strip():
+            section_text = heading.text.strip()
+        else:
+            # If no heading, try to use a class or id as identifier
+            section_id = section.get('id', '')
+            section_class = section.get('class', [])
+            section_text = section_id if section_id else ' '.join(section_class[:2])
+        
+        if section_text and section_text not in [s['name'] for s in major_sections]:
+            major_sections.append({
+                'name': section_text,
+                'type': section.name
+            })
+    
+    # Extract footer links (often important for site structure)
+    footer_links = []
+    
+    if footer:
+        links = footer.find_all('a')
+        for link in links:
+            if link.get('href') and link.text.strip():
+                footer_links.append({
+                    'text': link.text.strip(),
+                    'href': link.get('href')
+                })
+    
+    # Count different types of content
+    num_images = tag_counts['img']
+    num_forms = tag_counts['form']
+    num_buttons = tag_counts['button']
+    num_links = tag_counts['a']
+    
+    # Format the output
+    output = [
+        f"Website Structure Analysis for: {url}",
+        f"Title: {title}",
+        f"Description: {meta_description}" if meta_description else "Description: None found",
+        "\nMain Navigation:",
+    ]
+    
+    if main_menu_items:
+        output.append("  - " + ", ".join(main_menu_items))
+    else:
+        output.append("  No clear navigation menu found")
+    
+    output.append("\nMajor Sections:")
+    if major_sections:
+        for section in major_sections:
+            output.append(f"  - {section['name']} ({section['type']})")
+    else:
+        output.append("  No clear sections identified")
+    
+    output.append("\nFooter Links:")
+    if footer_links:
+        for i, link in enumerate(footer_links[:5]):  # Show first 5 footer links
+            output.append(f"  - {link['text']}")
+        if len(footer_links) > 5:
+            output.append(f"  - ... and {len(footer_links) - 5} more links")
+    else:
+        output.append("  No footer links found")
+    
+    output.append("\nContent Summary:")
+    output.append(f"  - {num_images} images")
+    output.append(f"  - {num_forms} forms")
+    output.append(f"  - {num_buttons} buttons")
+    output.append(f"  - {num_links} links total")
+    
+    return "\n".join(output)
+
+
 class ExtractWebsiteStructureTool(BaseTool):
     """Tool for extracting the structure of a website."""
     
@@ -566,137 +1005,75 @@ class ExtractWebsiteStructureTool(BaseTool):
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            # Fetch the webpage
+            # Fetch the webpage, streaming the body so it is only read if needed
             try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                html_content = response.text
+                with _SESSION.get(url, timeout=10, stream=True) as response:
+                    response.raise_for_status()
+                    
+                    # Reuse the report for an unchanged page instead of downloading and parsing it again
+                    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                    cache_key = (url, validator) if validator else None
+                    if cache_key is not None:
+                        report = _structure_cache_get(cache_key)
+                        if report is not None:
+                            return report
+                    
+                    html_content = _read_structure_html(response)
+                    encoding = _declared_encoding(response)
             except requests.exceptions.RequestException as e:
                 return f"Error fetching website: {str(e)}"
             
-            # Parse the HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Extract the title and meta description
-            title = soup.title.string.strip() if soup.title else "No title found"
-            
-            meta_description = ""
-            description_tag = soup.find("meta", attrs={"name": "description"})
-            if description_tag and description_tag.get("content"):
-                meta_description = description_tag.get("content").strip()
-            
-            # Extract navigation links
-            nav_elements = soup.find_all(['nav', 'div'], class_=lambda c: c and (
-                'nav' in c.lower() or
-                'menu' in c.lower() or
-                'navigation' in c.lower() or
-                'header' in c.lower()
-            ))
-            
-            nav_links = []
-            main_menu_items = []
-            
-            if nav_elements:
-                # Extract links from the first navigation element (usually the main navigation)
-                links = nav_elements[0].find_all('a')
-                for link in links:
-                    if link.get('href') and link.text.strip():
-                        nav_links.append({
-                            'text': link.text.strip(),
-                            'href': link.get('href')
-                        })
-                
-                # Extract main menu items as text only for a cleaner overview
-                main_menu_items = [link['text'] for link in nav_links[:8]]  # Limit to first 8 items
-            
-            # Find major sections of the page
-            potential_sections = soup.find_all(['section', 'div', 'article'], class_=lambda c: c and (
-                'section' in str(c).lower() or
-                'container' in str(c).lower() or
-                'content' in str(c).lower() or
-                'wrapper' in str(c).lower() or
-                'block' in str(c).lower()
-            ))
-            
-            major_sections = []
-            for section in potential_sections[:5]:  # Limit to first 5 potential sections
-                # Try to find a heading in this section
-                heading = section.find(['h1', 'h2', 'h3'])
-                if heading and heading.text.strip():
-                    section_text = heading.text.strip()
-                else:
-                    # If no heading, try to use a class or id as identifier
-                    section_id = section.get('id', '')
-                    section_class = section.get('class', [])
-                    section_text = section_id if section_id else ' '.join(section_class[:2])
-                
-                if section_text and section_text not in [s['name'] for s in major_sections]:
-                    major_sections.append({
-                        'name': section_text,
-                        'type': section.name
-                    })
-            
-            # Extract footer links (often important for site structure)
-            footer = soup.find(['footer', 'div'], class_=lambda c: c and 'footer' in str(c).lower())
-            footer_links = []
-            
-            if footer:
-                links = footer.find_all('a')
-                for link in links:
-                    if link.get('href') and link.text.strip():
-                        footer_links.append({
-                            'text': link.text.strip(),
-                            'href': link.get('href')
-                        })
-            
-            # Count different types of content
-            num_images = len(soup.find_all('img'))
-            num_forms = len(soup.find_all('form'))
-            num_buttons = len(soup.find_all('button'))
-            num_links = len(soup.find_all('a'))
-            
-            # Format the output
-            output = [
-                f"Website Structure Analysis for: {url}",
-                f"Title: {title}",
-                f"Description: {meta_description}" if meta_description else "Description: None found",
-                "\nMain Navigation:",
-            ]
-            
-            if main_menu_items:
-                output.append("  - " + ", ".join(main_menu_items))
-            else:
-                output.append("  No clear navigation menu found")
-            
-            output.append("\nMajor Sections:")
-            if major_sections:
-                for section in major_sections:
-                    output.append(f"  - {section['name']} ({section['type']})")
-            else:
-                output.append("  No clear sections identified")
-            
-            output.append("\nFooter Links:")
-            if footer_links:
-                for i, link in enumerate(footer_links[:5]):  # Show first 5 footer links
-                    output.append(f"  - {link['text']}")
-                if len(footer_links) > 5:
-                    output.append(f"  - ... and {len(footer_links) - 5} more links")
-            else:
-                output.append("  No footer links found")
+            # Pages without validators (or with changed ones) may still have identical content
+            content_key = (url, encoding, hashlib.blake2b(html_content, digest_size=16).digest())
+            report = _structure_cache_get(content_key)
+            if report is None:
+                report = _analyze_structure(url, html_content, encoding)
+                _structure_cache_put(content_key, report)
             
-            output.append("\nContent Summary:")
-            output.append(f"  - {num_images} images")
-            output.append(f"  - {num_forms} forms")
-            output.append(f"  - {num_buttons} buttons")
-            output.append(f"  - {num_links} links total")
+            if cache_key is not None:
+                _structure_cache_put(cache_key, report)
             
-            return "\n".join(output)
+            return report
             
         except Exception as e:
             logger.error(f"Error analyzing website structure: {str(e)}")
             return f"Error analyzing website structure: {str(e)}"
 
 
+# Selectors that are just a tag, #id or .class (optionally tag#id or tag.class); these
+# can be applied while parsing so save_website_content only builds the subtrees it keeps
+_SIMPLE_SELECTOR_RE = re.compile(r"^([a-zA-Z][\w-]*)?(?:#([\w-]+)|\.([\w-]+))?$")
+
+
+def _class_filter(class_name: str) -> Callable[[Any], bool]:
+    """SoupStrainer class filter that matches one whole class name.
+    
+    bs4 4.12-4.15 pass the raw attribute string (e.g. "nav main") while parsing, where a
+    plain class_="nav" misses multi-class elements; a single class or a list is accepted too.
+    """
+    def matches(value) -> bool:
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return class_name in classes
+    return matches
+
+
+def _strainer_for_selector(selector: str):
+    """Return a SoupStrainer for a simple CSS selector, or None if it needs a full parse."""
+    match = _SIMPLE_SELECTOR_RE.match(selector.strip())
+    if match is None or not any(match.groups()):
+        return None
+    
+    name, element_id, class_name = match.groups()
+    attrs = {}
+    if element_id:
+        attrs["id"] = element_id
+    if class_name:
+        attrs["class"] = _class_filter(class_name)
+    return SoupStrainer(name.lower() if name else None, attrs=attrs)
+
+
 class SaveWebsiteContentTool(BaseTool):
     """Tool for extracting and saving content from a website to a local file."""
     
@@ -726,7 +1103,6 @@ class SaveWebsiteContentTool(BaseTool):
         
         try:
             # Parse the input
-            import json
             try:
                 save_info = json.loads(save_info_str)
             except json.JSONDecodeError:
@@ -761,25 +1137,36 @@ class SaveWebsiteContentTool(BaseTool):
             except requests.exceptions.RequestException as e:
                 return f"Error fetching website: {str(e)}"
             
-            # Parse the HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Parse the HTML, skipping subtrees a simple selector could never match
+            strainer = _strainer_for_selector(selector) if selector else None
+            soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=strainer)
             
             # Extract specific content if a selector is provided
             if selector:
                 elements = soup.select(selector)
+                if not elements and strainer is not None:
+                    # Never let the strained parse hide a match: check the whole document
+                    soup = BeautifulSoup(html_content, HTML_PARSER)
+                    elements = soup.select(selector)
                 if not elements:
                     return f"Error: No elements found matching selector '{selector}'"
                 
-                # Create a new soup with just the selected elements
-                from bs4 import BeautifulSoup as BS
-                selected_soup = BS("<div></div>", "html.parser")
-                div = selected_soup.div
-                
-                for element in elements:
-                    div.append(selected_soup.new_tag(element.name))
-                    div.contents[-1].append(element)
+                # A match nested inside another match is already part of it; moving it out on
+                # its own would strip it from the enclosing match
+                selected_ids = {id(element) for element in elements}
+                elements = [
+                    element for element in elements
+                    if not any(id(parent) in selected_ids for parent in element.parents)
+                ]
                 
-                soup = selected_soup
+                # Keep just the selected elements, moving them under one root if there are several
+                if len(elements) == 1:
+                    soup = elements[0]
+                else:
+                    root = BeautifulSoup("<div></div>", HTML_PARSER).div
+                    for element in elements:
+                        root.append(element.extract())
+                    soup = root
             
             # Clean up the HTML (remove scripts, styles, etc.)
             for script in soup(["script", "style", "iframe", "noscript"]):
@@ -789,6 +1176,7 @@ class SaveWebsiteContentTool(BaseTool):
             if content_type == "html":
                 content = str(soup)
             elif content_type == "markdown":
+                html2text = _get_html2text()
                 if html2text:
                     h = html2text.HTML2Text()
                     h.ignore_links = False
@@ -815,8 +1203,7 @@ class SaveWebsiteContentTool(BaseTool):
                     file.write(content)
                 
                 # Get file stats
-                file_size = os.path.getsize(file_path)
-                file_size_formatted = f"{file_size / 1024:.2f} KB" if file_size < 1024 * 1024 else f"{file_size / (1024 * 1024):.2f} MB"
+                file_size_formatted = _format_file_size(os.path.getsize(file_path))
                 
                 # Count number of lines
                 num_lines = len(content.split('\n'))
@@ -869,7 +1256,6 @@ class LoginWebsiteTool(BaseTool):
         
         try:
             # Parse the input
-            import json
             try:
                 login_info = json.loads(login_info_str)
             except json.JSONDecodeError:
@@ -891,132 +1277,130 @@ class LoginWebsiteTool(BaseTool):
             submit_selector = login_info["submit_selector"]
             success_indicator = login_info.get("success_indicator")
             
-            # Get WebDriver instance
-            driver_manager = WebDriverManager()
-            driver = driver_manager.get_driver()
-            
-            if driver is None:
-                return "Error: Failed to initialize WebDriver"
-            
-            # Navigate to the login page
-            try:
-                if not url.startswith(('http://', 'https://')):
-                    url = 'https://' + url
+            # Check a WebDriver out of the pool for the duration of this call
+            with WebDriverManager().acquire() as driver:
+                if driver is None:
+                    return "Error: Failed to initialize WebDriver"
                 
-                driver.get(url)
-                logger.info(f"Navigated to login page: {url}")
-                time.sleep(2)  # Brief pause to ensure page loads
-            except Exception as e:
-                return f"Error: Failed to navigate to login page: {str(e)}"
-            
-            # Fill in the username field
-            try:
-                username_field = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, username_selector))
-                )
-                username_field.clear()
-                username_field.send_keys(username)
-                logger.info("Filled username field")
-            except TimeoutException:
-                return f"Timeout waiting for username field: {username_selector}"
-            except NoSuchElementException:
-                return f"Username field not found: {username_selector}"
-            except Exception as e:
-                return f"Error filling username field: {str(e)}"
-            
-            # Fill in the password field
-            try:
-                password_field = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, password_selector))
-                )
-                password_field.clear()
-                password_field.send_keys(password)
-                logger.info("Filled password field")
-            except TimeoutException:
-                return f"Timeout waiting for password field: {password_selector}"
-            except NoSuchElementException:
-                return f"Password field not found: {password_selector}"
-            except Exception as e:
-                return f"Error filling password field: {str(e)}"
-            
-            # Click the submit button
-            try:
-                submit_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, submit_selector))
-                )
+                # Navigate to the login page
+                try:
+                    if not url.startswith(('http://', 'https://')):
+                        url = 'https://' + url
+                    
+                    driver.get(url)
+                    logger.info(f"Navigated to login page: {url}")
+                    time.sleep(2)  # Brief pause to ensure page loads
+                except Exception as e:
+                    return f"Error: Failed to navigate to login page: {str(e)}"
                 
-                driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-                time.sleep(0.5)
+                # Fill in the username field
+                try:
+                    username_field = driver._autopilot_wait.until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, username_selector))
+                    )
+                    username_field.clear()
+                    username_field.send_keys(username)
+                    logger.info("Filled username field")
+                except TimeoutException:
+                    return f"Timeout waiting for username field: {username_selector}"
+                except NoSuchElementException:
+                    return f"Username field not found: {username_selector}"
+                except Exception as e:
+                    return f"Error filling username field: {str(e)}"
                 
-                submit_button.click()
-                logger.info("Clicked submit button")
-                time.sleep(3)  # Wait longer for login to complete
-            except TimeoutException:
-                return f"Timeout waiting for submit button: {submit_selector}"
-            except NoSuchElementException:
-                return f"Submit button not found: {submit_selector}"
-            except Exception as e:
-                return f"Error clicking submit button: {str(e)}"
-            
-            # Check for successful login if success indicator is provided
-            if success_indicator:
+                # Fill in the password field
                 try:
-                    # Check if success_indicator is a CSS selector or plain text
-                    if success_indicator.startswith('.') or success_indicator.startswith('#') or '[' in success_indicator:
-                        # It's likely a CSS selector
-                        try:
-                            # Wait for the success element to be present
-                            WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, success_indicator))
-                            )
-                            login_successful = True
-                        except:
-                            login_successful = False
-                    else:
-                        # It's likely plain text to find in the page
-                        login_successful = success_indicator in driver.page_source
+                    password_field = driver._autopilot_wait.until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, password_selector))
+                    )
+                    password_field.clear()
+                    password_field.send_keys(password)
+                    logger.info("Filled password field")
+                except TimeoutException:
+                    return f"Timeout waiting for password field: {password_selector}"
+                except NoSuchElementException:
+                    return f"Password field not found: {password_selector}"
+                except Exception as e:
+                    return f"Error filling password field: {str(e)}"
+                
+                # Click the submit button
+                try:
+                    submit_button = driver._autopilot_wait.until(
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, submit_selector))
+                    )
                     
-                    if not login_successful:
-                        # Check for common error messages
-                        error_patterns = [
-                            "incorrect password", "invalid password",
-                            "incorrect username", "invalid username",
-                            "invalid login", "incorrect login",
-                            "wrong credentials", "login failed"
-                        ]
-                        
-                        page_text = driver.page_source.lower()
-                        found_errors = [error for error in error_patterns if error in page_text]
-                        
-                        if found_errors:
-                            return f"Login failed. Possible error: {found_errors[0]}"
-                        else:
-                            return "Login appears to have failed. Success indicator not found."
+                    driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
+                    time.sleep(0.5)
+                    
+                    submit_button.click()
+                    logger.info("Clicked submit button")
+                    time.sleep(3)  # Wait longer for login to complete
+                except TimeoutException:
+                    return f"Timeout waiting for submit button: {submit_selector}"
+                except NoSuchElementException:
+                    return f"Submit button not found: {submit_selector}"
                 except Exception as e:
-                    return f"Error checking login success: {str(e)}"
-            
-            # Get current state of the page
-            current_url = driver.current_url
-            page_title = driver.title
-            
-            # Format the results (do not include the password in the response for security)
-            obfuscated_username = username[:2] + '*' * (len(username) - 4) + username[-2:] if len(username) > 4 else '****'
-            
-            output = [
-                f"Login attempt completed for: {obfuscated_username}",
-                f"Login URL: {url}",
-                f"Current URL: {current_url}",
-                f"Page Title: {page_title}",
-            ]
-            
-            # Try to determine login status based on URL change
-            if url != current_url and '/login' not in current_url.lower():
-                output.insert(0, "Login appears to be successful (URL changed).")
-            else:
-                output.insert(0, "Login status uncertain. Please check the page details below.")
-            
-            return "\n".join(output)
-            
+                    return f"Error clicking submit button: {str(e)}"
+                
+                # Check for successful login if success indicator is provided
+                if success_indicator:
+                    try:
+                        # Check if success_indicator is a CSS selector or plain text
+                        if success_indicator.startswith('.') or success_indicator.startswith('#') or '[' in success_indicator:
+                            # It's likely a CSS selector
+                            try:
+                                # Wait for the success element to be present
+                                driver._autopilot_wait.until(
+                                    EC.presence_of_element_located((By.CSS_SELECTOR, success_indicator))
+                                )
+                                login_successful = True
+                            except:
+                                login_successful = False
+                        else:
+                            # It's likely plain text to find in the page
+                            login_successful = success_indicator in driver.page_source
+                        
+                        if not login_successful:
+                            # Check for common error messages
+                            error_patterns = [
+                                "incorrect password", "invalid password",
+                                "incorrect username", "invalid username",
+                                "invalid login", "incorrect login",
+                                "wrong credentials", "login failed"
+                            ]
+                            
+                            page_text = driver.page_source.lower()
+                            found_errors = [error for error in error_patterns if error in page_text]
+                            
+                            if found_errors:
+                                return f"Login failed. Possible error: {found_errors[0]}"
+                            else:
+                                return "Login appears to have failed. Success indicator not found."
+                    except Exception as e:
+                        return f"Error checking login success: {str(e)}"
+                
+                # Get current state of the page
+                current_url = driver.current_url
+                page_title = driver.title
+                
+                # Format the results (do not include the password in the response for security)
+                obfuscated_username = username[:2] + '*' * (len(username) - 4) + username[-2:] if len(username) > 4 else '****'
+                
+                output = [
+                    f"Login attempt completed for: {obfuscated_username}",
+                    f"Login URL: {url}",
+                    f"Current URL: {current_url}",
+                    f"Page Title: {page_title}",
+                ]
+                
+                # Try to determine login status based on URL change
+                if url != current_url and '/login' not in current_url.lower():
+                    output.insert(0, "Login appears to be successful (URL changed).")
+                else:
+                    output.insert(0, "Login status uncertain. Please check the page details below.")
+                
+                return "\n".join(output)
+                
         except Exception as e:
             logger.error(f"Error in login process: {str(e)}")
             return f"Error in login process: {str(e)}"
\ No newline at end of file